@@ -7,38 +7,87 @@ This demonstrates the interaction pattern for agents to:
 1. Send messages to the agent-creation-queue
 2. Read messages from the queue
 3. Process messages and delete them when done
+
+Uses the async Azure SDK (requires ``aiohttp``).
 """
 
+import asyncio
+import io
 import json
 import os
-from azure.identity import DefaultAzureCredential
-from azure.storage.queue import QueueClient
+import sys
+from typing import Union
+from azure.identity.aio import AzureCliCredential, ChainedTokenCredential, ManagedIdentityCredential
+from azure.storage.queue.aio import QueueClient
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; fall back to the stdlib
+    orjson = None
+
+
+def _dumps(obj) -> str:
+    """Serialize *obj* to a JSON string (orjson when available)."""
+    return orjson.dumps(obj).decode() if orjson else json.dumps(obj)
+
+
+def _loads(data):
+    """Parse JSON text or bytes (orjson when available)."""
+    return orjson.loads(data) if orjson else json.loads(data)
 
 
-def main():
+def _build_credential() -> Union[ManagedIdentityCredential, ChainedTokenCredential]:
+    """Credential limited to the sources that can actually succeed.
+
+    Inside a Function App (``FUNCTIONS_WORKER_RUNTIME`` is set) only managed
+    identity can work, so it is used directly. Elsewhere managed identity is
+    tried before the Azure CLI so local runs and deployed runs behave alike.
+    """
+    managed_identity = ManagedIdentityCredential(client_id=os.environ.get("AZURE_CLIENT_ID"))
+    if os.environ.get("FUNCTIONS_WORKER_RUNTIME"):
+        return managed_identity
+    return ChainedTokenCredential(managed_identity, AzureCliCredential())
+
+
+def _flush(buf: io.StringIO) -> None:
+    """Write buffered output with a single stdout write, then reset the buffer."""
+    sys.stdout.write(buf.getvalue())
+    buf.seek(0)
+    buf.truncate()
+
+
+async def main():
     # These values would come from your Foundry agent's environment/configuration
     storage_account_name = os.environ.get("AGENT_STORAGE_ACCOUNT_NAME", "rangerblsdevagent")
     queue_name = os.environ.get("AGENT_QUEUE_NAME", "agent-creation-queue")
     
-    # Use managed identity authentication (same identity used by Foundry)
-    credential = DefaultAzureCredential()
-    
-    # Create queue client
-    queue_url = f"https://{storage_account_name}.queue.core.windows.net"
-    queue_client = QueueClient(
-        account_url=queue_url,
+    # Create queue client (managed identity, same identity used by Foundry).
+    # One credential + client (and one connection pool) for the whole run.
+    async with _build_credential() as credential, QueueClient(
+        account_url=f"https://{storage_account_name}.queue.core.windows.net",
         queue_name=queue_name,
         credential=credential
-    )
+    ) as queue_client:
+        # Each example block is written to stdout in one go rather than
+        # print-by-print; the finally keeps partial output if a block fails.
+        out = io.StringIO()
+        try:
+            await run_examples(queue_client, queue_name, out)
+        finally:
+            _flush(out)
+
+
+async def run_examples(queue_client: QueueClient, queue_name: str, out: io.StringIO):
+    print(f"📍 Connected to queue: {queue_name}", file=out)
+    print(f"🔐 Using managed identity authentication", file=out)
+    print(file=out)
     
-    print(f"📍 Connected to queue: {queue_name}")
-    print(f"🔐 Using managed identity authentication")
-    print()
+    _flush(out)
     
     # Example 1: Send a message to the queue
-    print("=" * 60)
-    print("Example 1: Sending a message to the queue")
-    print("=" * 60)
+    print("=" * 60, file=out)
+    print("Example 1: Sending a message to the queue", file=out)
+    print("=" * 60, file=out)
     
     agent_request = {
         "agentName": "example-agent",
@@ -55,29 +104,33 @@ def main():
         ]
     }
     
-    message_json = json.dumps(agent_request)
-    send_result = queue_client.send_message(message_json)
+    message_json = _dumps(agent_request)
+    send_result = await queue_client.send_message(message_json)
     
-    print(f"✅ Message sent successfully!")
-    print(f"   Message ID: {send_result.id}")
-    print(f"   Pop Receipt: {send_result.pop_receipt}")
-    print()
+    print(f"✅ Message sent successfully!", file=out)
+    print(f"   Message ID: {send_result.id}", file=out)
+    print(f"   Pop Receipt: {send_result.pop_receipt}", file=out)
+    print(file=out)
+    
+    _flush(out)
     
     # Example 2: Read messages from the queue (peek without removing)
-    print("=" * 60)
-    print("Example 2: Peeking at messages (read without removing)")
-    print("=" * 60)
+    print("=" * 60, file=out)
+    print("Example 2: Peeking at messages (read without removing)", file=out)
+    print("=" * 60, file=out)
     
-    peeked_messages = queue_client.peek_messages(max_messages=5)
+    peeked_messages = await queue_client.peek_messages(max_messages=5)
     for i, message in enumerate(peeked_messages, 1):
-        print(f"📬 Peeked Message {i}:")
-        print(f"   Content: {message.content[:100]}...")
-        print()
+        print(f"📬 Peeked Message {i}:", file=out)
+        print(f"   Content: {message.content[:100]}...", file=out)
+        print(file=out)
+    
+    _flush(out)
     
     # Example 3: Receive and process messages (with visibility timeout)
-    print("=" * 60)
-    print("Example 3: Receiving messages for processing")
-    print("=" * 60)
+    print("=" * 60, file=out)
+    print("Example 3: Receiving messages for processing", file=out)
+    print("=" * 60, file=out)
     
     # Receive messages (makes them invisible to other consumers for 30 seconds)
     received_messages = queue_client.receive_messages(
@@ -85,45 +138,47 @@ def main():
         visibility_timeout=30  # Hide from other consumers for 30 seconds
     )
     
-    for message in received_messages:
-        print(f"📨 Received Message:")
-        print(f"   ID: {message.id}")
-        print(f"   Insertion Time: {message.inserted_on}")
-        print(f"   Dequeue Count: {message.dequeue_count}")
-        print()
+    async for message in received_messages:
+        print(f"📨 Received Message:", file=out)
+        print(f"   ID: {message.id}", file=out)
+        print(f"   Insertion Time: {message.inserted_on}", file=out)
+        print(f"   Dequeue Count: {message.dequeue_count}", file=out)
+        print(file=out)
         
         try:
             # Parse and process the message
-            content = json.loads(message.content)
-            print(f"📋 Parsed Content:")
-            print(f"   Agent Name: {content.get('agentName')}")
-            print(f"   MCP Endpoint: {content.get('mcpEndpoint')}")
-            print(f"   Models: {len(content.get('models', []))} models")
-            print()
+            content = _loads(message.content)
+            print(f"📋 Parsed Content:", file=out)
+            print(f"   Agent Name: {content.get('agentName')}", file=out)
+            print(f"   MCP Endpoint: {content.get('mcpEndpoint')}", file=out)
+            print(f"   Models: {len(content.get('models', []))} models", file=out)
+            print(file=out)
             
             # After successful processing, delete the message
-            queue_client.delete_message(message)
-            print(f"✅ Message processed and deleted successfully!")
+            await queue_client.delete_message(message)
+            print(f"✅ Message processed and deleted successfully!", file=out)
             
         except json.JSONDecodeError as e:
-            print(f"❌ Error parsing message: {e}")
+            print(f"❌ Error parsing message: {e}", file=out)
             # In a real scenario, you might want to move this to a poison queue
         except Exception as e:
-            print(f"❌ Error processing message: {e}")
+            print(f"❌ Error processing message: {e}", file=out)
             # Message will become visible again after visibility timeout
     
-    print()
+    print(file=out)
+    
+    _flush(out)
     
     # Example 4: Get queue properties
-    print("=" * 60)
-    print("Example 4: Queue statistics")
-    print("=" * 60)
-    
-    properties = queue_client.get_queue_properties()
-    print(f"📊 Queue Properties:")
-    print(f"   Approximate Message Count: {properties.approximate_message_count}")
-    print(f"   Metadata: {properties.metadata}")
-    print()
+    print("=" * 60, file=out)
+    print("Example 4: Queue statistics", file=out)
+    print("=" * 60, file=out)
+    
+    properties = await queue_client.get_queue_properties()
+    print(f"📊 Queue Properties:", file=out)
+    print(f"   Approximate Message Count: {properties.approximate_message_count}", file=out)
+    print(f"   Metadata: {properties.metadata}", file=out)
+    print(file=out)
 
 
 if __name__ == "__main__":
@@ -131,7 +186,7 @@ if __name__ == "__main__":
     print()
     
     try:
-        main()
+        asyncio.run(main())
         print("✅ All examples completed successfully!")
     except Exception as e:
         print(f"❌ Error: {e}")
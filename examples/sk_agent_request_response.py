@@ -9,50 +9,137 @@ This demonstrates how a Foundry agent can:
 
 The SK agent in the Function App processes these requests internally
 and returns results (time, weather, calculations, etc.)
+
+The client is async (requires ``aiohttp``): ``send_query`` can be
+cancelled, times out precisely, and several queries can be awaited
+together with ``asyncio.gather``.
 """
 
+import asyncio
 import json
+import os
 import uuid
-import time
-from azure.identity import DefaultAzureCredential
-from azure.storage.queue import QueueClient
-from typing import Optional, Dict, Any
+from azure.core.pipeline.transport import AioHttpTransport
+from azure.identity.aio import AzureCliCredential, ChainedTokenCredential, ManagedIdentityCredential
+from azure.storage.queue.aio import QueueClient, QueueServiceClient
+from typing import Optional, Dict, Any, Union
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; fall back to the stdlib
+    orjson = None
+
+
+def _dumps(obj) -> str:
+    """Serialize *obj* to a JSON string (orjson when available)."""
+    return orjson.dumps(obj).decode() if orjson else json.dumps(obj)
+
+
+def _loads(data):
+    """Parse JSON text or bytes (orjson when available)."""
+    return orjson.loads(data) if orjson else json.loads(data)
+
+# Per-request response queues are named <prefix><requestId>; the Function App
+# only honours a ``responseQueue`` that starts with this prefix.
+RESPONSE_QUEUE_PREFIX = "sk-agent-response-"
+
+# How long a foreign reply on the shared queue stays hidden after we pass
+# over it: long enough to page past a backlog, short enough that its owner
+# sees it again within a couple of polls.
+_SCAN_VISIBILITY_TIMEOUT = 2
+
+
+def _build_credential() -> Union[ManagedIdentityCredential, ChainedTokenCredential]:
+    """Credential limited to the sources that can actually succeed.
+
+    Inside a Function App (``FUNCTIONS_WORKER_RUNTIME`` is set) only managed
+    identity can work, so it is used directly. Elsewhere managed identity is
+    tried before the Azure CLI so local runs and deployed runs behave alike.
+    """
+    managed_identity = ManagedIdentityCredential(client_id=os.environ.get("AZURE_CLIENT_ID"))
+    if os.environ.get("FUNCTIONS_WORKER_RUNTIME"):
+        return managed_identity
+    return ChainedTokenCredential(managed_identity, AzureCliCredential())
 
 
 class SemanticKernelAgentClient:
     """
     Client for Foundry agents to interact with the SK Agent via queues.
+    
+    Use as an async context manager (or call ``close()``) so the shared
+    connection pool and credential are released.
     """
     
     def __init__(
         self,
         storage_account_name: str,
         request_queue_name: str = "sk-agent-request-queue",
-        response_queue_name: str = "sk-agent-response-queue"
+        response_queue_name: str = "sk-agent-response-queue",
+        dedicated_response_queue: bool = True
     ):
+        """
+        Args:
+            storage_account_name: Agent storage account name
+            request_queue_name: Queue the SK agent listens on
+            response_queue_name: Shared response queue (used when
+                dedicated_response_queue is False)
+            dedicated_response_queue: Create a short-lived response queue per
+                request so only our own reply is ever read. Requires
+                permission to create/delete queues on the account.
+                When False, replies are scanned on the shared queue: other
+                requesters' messages -- including orphans left behind by
+                timed-out requests, which nothing deletes -- are briefly
+                hidden while we page past them, so a large backlog slows
+                every requester. Prefer dedicated queues.
+        """
         self.storage_account_name = storage_account_name
         self.request_queue_name = request_queue_name
         self.response_queue_name = response_queue_name
+        self.dedicated_response_queue = dedicated_response_queue
         
-        # Use managed identity (same as Foundry agent)
-        self.credential = DefaultAzureCredential()
+        # Use managed identity (same as Foundry agent), one per client
+        self.credential = _build_credential()
         
-        # Create queue clients
+        # Create queue clients. All of them talk to the same host, so share
+        # one transport (one aiohttp session / connection pool) between them
+        # instead of paying a separate TLS handshake per client.
         account_url = f"https://{storage_account_name}.queue.core.windows.net"
+        self.transport = AioHttpTransport()
+        
+        self.queue_service = QueueServiceClient(
+            account_url=account_url,
+            credential=self.credential,
+            transport=self.transport
+        )
         
         self.request_queue = QueueClient(
             account_url=account_url,
             queue_name=request_queue_name,
-            credential=self.credential
+            credential=self.credential,
+            transport=self.transport
         )
         
         self.response_queue = QueueClient(
             account_url=account_url,
             queue_name=response_queue_name,
-            credential=self.credential
+            credential=self.credential,
+            transport=self.transport
         )
     
-    def send_query(
+    async def __aenter__(self) -> "SemanticKernelAgentClient":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+    
+    async def close(self) -> None:
+        """Close the queue clients, shared transport and credential."""
+        await self.request_queue.close()
+        await self.response_queue.close()
+        await self.queue_service.close()
+        await self.credential.close()
+    
+    async def send_query(
         self,
         query: str,
         requester: str = "foundry-agent",
@@ -68,6 +155,9 @@ class SemanticKernelAgentClient:
             
         Returns:
             Dictionary with answer and metadata
+            
+        Raises:
+            TimeoutError: If no response arrives within *timeout* seconds
         """
         # Generate unique request ID
         request_id = str(uuid.uuid4())
@@ -79,58 +169,105 @@ class SemanticKernelAgentClient:
             "requester": requester
         }
         
+        # Give this request its own response queue, or fall back to the shared one
+        if self.dedicated_response_queue:
+            response_queue_name = f"{RESPONSE_QUEUE_PREFIX}{request_id}"
+            response_queue = await self.queue_service.create_queue(response_queue_name)
+            request_message["responseQueue"] = response_queue_name
+        else:
+            response_queue = self.response_queue
+        
         print(f"📤 Sending query to SK Agent:")
         print(f"   Request ID: {request_id}")
         print(f"   Query: {query}")
         print()
         
-        # Send to request queue
-        self.request_queue.send_message(json.dumps(request_message))
+        try:
+            # Send to request queue
+            await self.request_queue.send_message(_dumps(request_message))
+            
+            # Poll response queue for answer; wait_for cancels the poll the
+            # moment the deadline passes (or the caller cancels us)
+            print("⏳ Waiting for response...")
+            try:
+                return await asyncio.wait_for(
+                    self._poll_for(response_queue, request_id), timeout
+                )
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"No response received within {timeout} seconds for request {request_id}") from None
+        finally:
+            if self.dedicated_response_queue:
+                await response_queue.delete_queue()
+    
+    async def _poll_for(
+        self,
+        response_queue: QueueClient,
+        request_id: str
+    ) -> Dict[str, Any]:
+        """Poll *response_queue* until the response for *request_id* arrives."""
+        idle_polls = 0
         
-        # Poll response queue for answer
-        print("⏳ Waiting for response...")
-        start_time = time.time()
+        # Match the exact requestId field (stdlib and orjson separators) so a
+        # foreign response that merely mentions our id is not parsed either
+        needle = f'"requestId": "{request_id}"'
+        needle_compact = f'"requestId":"{request_id}"'
         
-        while time.time() - start_time < timeout:
-            # Check for messages in response queue
-            messages = self.response_queue.receive_messages(
-                max_messages=32,
-                visibility_timeout=5
-            )
+        while True:
+            # Receive (not peek) so every foreign message we pass over is
+            # hidden for a moment and the next poll reaches the messages
+            # behind it; peek would only ever show the oldest 32.
+            messages = [
+                message async for message in response_queue.receive_messages(
+                    max_messages=32,
+                    visibility_timeout=_SCAN_VISIBILITY_TIMEOUT
+                )
+            ]
             
+            saw_candidate = False
             for message in messages:
+                # Cheap substring test first so foreign responses are never parsed
+                content = message.content
+                if needle not in content and needle_compact not in content:
+                    continue
+                saw_candidate = True
+                
                 try:
-                    response_data = json.loads(message.content)
-                    
-                    # Check if this is our response
-                    if response_data.get("requestId") == request_id:
-                        # Found our response! Delete the message
-                        self.response_queue.delete_message(message)
-                        
-                        print(f"✅ Received response!")
-                        print(f"   Answer: {response_data.get('answer')}")
-                        print(f"   Processing time: {response_data.get('metadata', {}).get('processingTime')} seconds")
-                        print(f"   Plugins used: {response_data.get('metadata', {}).get('pluginsUsed')}")
-                        print()
-                        
-                        return response_data
-                    else:
-                        # Not our message, make it visible again
-                        # (it will timeout automatically)
-                        pass
-                        
+                    response_data = _loads(content)
                 except json.JSONDecodeError:
                     # Invalid message, skip
-                    pass
+                    continue
+                
+                # Check if this is our response (always true on a dedicated queue)
+                if response_data.get("requestId") == request_id:
+                    # Found our response! Delete it while we still hold it
+                    await response_queue.delete_message(message)
+                    
+                    print(f"✅ Received response!")
+                    print(f"   Answer: {response_data.get('answer')}")
+                    print(f"   Processing time: {response_data.get('metadata', {}).get('processingTime')} seconds")
+                    print(f"   Plugins used: {response_data.get('metadata', {}).get('pluginsUsed')}")
+                    print()
+                    
+                    return response_data
             
-            # Wait a bit before checking again
-            time.sleep(0.5)
-        
-        # Timeout
-        raise TimeoutError(f"No response received within {timeout} seconds for request {request_id}")
+            # Back off exponentially (50 ms -> 2 s) across polls that carry
+            # nothing for us; stale foreign replies must not pin the loop at
+            # the floor, so only a requestId match resets the backoff
+            idle_polls = 0 if saw_candidate else idle_polls + 1
+            await asyncio.sleep(min(0.05 * 2 ** idle_polls, 2.0))
 
 
-def main():
+async def ask(client: SemanticKernelAgentClient, title: str, query: str, requester: str):
+    """Run one example query and print the outcome."""
+    try:
+        response = await client.send_query(query=query, requester=requester)
+        print(f"{title} -> Agent can now use this answer: {response['answer']}")
+    except TimeoutError as e:
+        print(f"{title} -> ⚠️  {e}")
+    print()
+
+
+async def main():
     """
     Example usage from a Foundry agent's perspective.
     """
@@ -141,62 +278,22 @@ def main():
     # Initialize the client (in a real Foundry agent, these would come from the connection)
     storage_account_name = "rangerblsdevagent"  # From deployment outputs
     
-    client = SemanticKernelAgentClient(
+    async with SemanticKernelAgentClient(
         storage_account_name=storage_account_name,
         request_queue_name="sk-agent-request-queue",
         response_queue_name="sk-agent-response-queue"
-    )
-    
-    # Example 1: Ask for current time
-    print("Example 1: Getting current time")
-    print("-" * 60)
-    
-    try:
-        response = client.send_query(
-            query="What is the current time?",
-            requester="foundry-time-agent"
-        )
-        
-        print(f"Agent can now use this answer: {response['answer']}")
-        print()
-        
-    except TimeoutError as e:
-        print(f"⚠️  {e}")
-        print()
-    
-    # Example 2: Ask for weather
-    print("Example 2: Getting weather information")
-    print("-" * 60)
-    
-    try:
-        response = client.send_query(
-            query="What is the weather in Seattle?",
-            requester="foundry-weather-agent"
-        )
-        
-        print(f"Agent can now use this answer: {response['answer']}")
-        print()
-        
-    except TimeoutError as e:
-        print(f"⚠️  {e}")
-        print()
-    
-    # Example 3: Complex query
-    print("Example 3: Complex calculation")
-    print("-" * 60)
-    
-    try:
-        response = client.send_query(
-            query="Calculate the time difference between New York (EST) and Tokyo (JST)",
-            requester="foundry-calculation-agent"
+    ) as client:
+        # The three example queries are independent, so issue them together;
+        # total wait is roughly the slowest reply rather than the sum.
+        await asyncio.gather(
+            ask(client, "Example 1: Getting current time",
+                "What is the current time?", "foundry-time-agent"),
+            ask(client, "Example 2: Getting weather information",
+                "What is the weather in Seattle?", "foundry-weather-agent"),
+            ask(client, "Example 3: Complex calculation",
+                "Calculate the time difference between New York (EST) and Tokyo (JST)",
+                "foundry-calculation-agent"),
         )
-        
-        print(f"Agent can now use this answer: {response['answer']}")
-        print()
-        
-    except TimeoutError as e:
-        print(f"⚠️  {e}")
-        print()
 
 
 def example_foundry_agent_integration():
@@ -213,19 +310,19 @@ def example_foundry_agent_integration():
 In your Foundry agent code, you can use the SK Agent like this:
 
 ```python
-# Initialize the client
+# Initialize the client (close it with `await sk_client.close()` on shutdown)
 sk_client = SemanticKernelAgentClient(
     storage_account_name=os.environ.get("AGENT_STORAGE_ACCOUNT_NAME"),
     request_queue_name="sk-agent-request-queue",
     response_queue_name="sk-agent-response-queue"
 )
 
-# In your agent's message handler
-def handle_user_message(user_message):
+# In your agent's (async) message handler
+async def handle_user_message(user_message):
     # Check if we need external information
     if "time" in user_message.lower():
         # Ask SK agent for time
-        response = sk_client.send_query(
+        response = await sk_client.send_query(
             query="What is the current time?",
             requester="my-foundry-agent",
             timeout=10
@@ -236,7 +333,7 @@ def handle_user_message(user_message):
     
     elif "weather" in user_message.lower():
         # Ask SK agent for weather
-        response = sk_client.send_query(
+        response = await sk_client.send_query(
             query=f"Weather information for: {user_message}",
             requester="my-foundry-agent",
             timeout=15
@@ -256,7 +353,7 @@ Foundry agents to leverage the SK agent's capabilities.
 
 if __name__ == "__main__":
     try:
-        main()
+        asyncio.run(main())
         example_foundry_agent_integration()
         
         print()
@@ -5,15 +5,69 @@ Sample script to submit agent creation requests to the Azure Storage Queue.
 Supports two message formats:
 1. New format (recommended): Uses agent_name, model, instructions, tools
 2. Legacy format: Uses agentName, mcpEndpoint, models
+
+Uses the async Azure SDK (requires ``aiohttp``); ``submit_many`` sends a
+batch of messages concurrently over a single connection pool.
 """
 
+import asyncio
 import json
 import argparse
-from azure.storage.queue import QueueClient
-from azure.identity import DefaultAzureCredential
+import os
+from typing import Union
+from azure.storage.queue.aio import QueueClient
+from azure.identity.aio import AzureCliCredential, ChainedTokenCredential, ManagedIdentityCredential
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; fall back to the stdlib
+    orjson = None
+
+
+def _dumps(obj) -> str:
+    """Serialize *obj* to a JSON string (orjson when available)."""
+    return orjson.dumps(obj).decode() if orjson else json.dumps(obj)
+
+
+def _build_credential() -> Union[ManagedIdentityCredential, ChainedTokenCredential]:
+    """Credential limited to the sources that can actually succeed.
+
+    Inside a Function App (``FUNCTIONS_WORKER_RUNTIME`` is set) only managed
+    identity can work, so it is used directly. Elsewhere managed identity is
+    tried before the Azure CLI so local runs and deployed runs behave alike.
+    """
+    managed_identity = ManagedIdentityCredential(client_id=os.environ.get("AZURE_CLIENT_ID"))
+    if os.environ.get("FUNCTIONS_WORKER_RUNTIME"):
+        return managed_identity
+    return ChainedTokenCredential(managed_identity, AzureCliCredential())
+
+
+async def submit_many(storage_account_name: str, queue_name: str, messages: list) -> list:
+    """
+    Send several messages concurrently over one credential + connection pool.
+    
+    Args:
+        storage_account_name: Name of the storage account
+        queue_name: Name of the queue
+        messages: Message dicts to serialize and send
+        
+    Returns:
+        The serialized message strings, in the order given
+    """
+    queue_url = f"https://{storage_account_name}.queue.core.windows.net"
+    payloads = [_dumps(m) for m in messages]
+    
+    async with _build_credential() as credential, QueueClient(
+        account_url=queue_url,
+        queue_name=queue_name,
+        credential=credential
+    ) as queue_client:
+        await asyncio.gather(*(queue_client.send_message(p) for p in payloads))
+    
+    return payloads
 
 
-def submit_agent_creation_request(
+async def submit_agent_creation_request(
     storage_account_name: str,
     queue_name: str,
     agent_name: str,
@@ -39,16 +93,6 @@ def submit_agent_creation_request(
         models: List of model definitions - legacy format
         use_legacy: Use legacy message format
     """
-    # Create queue client using managed identity
-    credential = DefaultAzureCredential()
-    queue_url = f"https://{storage_account_name}.queue.core.windows.net"
-    
-    queue_client = QueueClient(
-        account_url=queue_url,
-        queue_name=queue_name,
-        credential=credential
-    )
-    
     # Create message based on format
     if use_legacy:
         # Legacy format
@@ -69,8 +113,7 @@ def submit_agent_creation_request(
             message["tools"] = tools
     
     # Send message
-    message_json = json.dumps(message)
-    queue_client.send_message(message_json)
+    [message_json] = await submit_many(storage_account_name, queue_name, [message])
     
     print(f"✅ Successfully submitted agent creation request for: {agent_name}")
     print(f"📝 Message: {message_json}")
@@ -160,17 +203,17 @@ def main():
             ]
             print("ℹ️  Using default model configuration")
         
-        submit_agent_creation_request(
+        asyncio.run(submit_agent_creation_request(
             storage_account_name=args.storage_account,
             queue_name=args.queue_name,
             agent_name=args.agent_name,
             mcp_endpoint=args.mcp_endpoint,
             models=models,
             use_legacy=True
-        )
+        ))
     else:
         # New format (recommended)
-        submit_agent_creation_request(
+        asyncio.run(submit_agent_creation_request(
             storage_account_name=args.storage_account,
             queue_name=args.queue_name,
             agent_name=args.agent_name,
@@ -178,7 +221,7 @@ def main():
             instructions=args.instructions,
             tools=args.tools,
             use_legacy=False
-        )
+        ))
 
 
 if __name__ == "__main__":
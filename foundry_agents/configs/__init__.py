@@ -1,7 +1,29 @@
-"""configs — Infrastructure settings and tool definitions."""
+"""configs — Infrastructure settings and tool definitions.
+
+``constants`` is imported eagerly (it is plain literals); everything else is
+resolved lazily (PEP 562) so reading a constant does not pull in Key Vault.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
 
-from foundry_agents.configs.settings import Settings, get_settings
-from foundry_agents.configs.tools_registry import resolve_tools, list_available_tools
 from foundry_agents.configs import constants
 
+if TYPE_CHECKING:
+    from foundry_agents.configs.settings import Settings, get_settings
+    from foundry_agents.configs.tools_registry import list_available_tools, resolve_tools
+
 __all__ = ["Settings", "get_settings", "resolve_tools", "list_available_tools", "constants"]
+
+
+def __getattr__(name: str):
+    if name in ("Settings", "get_settings"):
+        from foundry_agents.configs import settings
+
+        return getattr(settings, name)
+    if name in ("resolve_tools", "list_available_tools"):
+        from foundry_agents.configs import tools_registry
+
+        return getattr(tools_registry, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,6 +4,9 @@ Settings — single source of truth for all infra / runtime configuration.
 Values are resolved from Azure Key Vault at runtime using secret names
 defined in constants.py.  The AZURE_CLIENT_ID and KEY_VAULT_URI are the
 only env-var bootstraps (set by Bicep app settings).
+
+``get_settings()`` fetches all secrets concurrently on first use, so cold
+start pays for the slowest Key Vault call rather than the sum of them.
 """
 
 from __future__ import annotations
@@ -19,10 +22,10 @@ from foundry_agents.configs.constants import (
     KV_FOUNDRY_PROJECT_ENDPOINT,
     KV_MCP_CONNECTION_ID,
 )
-from foundry_agents.utils.akv import get_secret
+from foundry_agents.utils.akv import get_secret, warm_cache
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Settings:
     """Immutable bag of configuration — secrets resolved from Key Vault."""
 
@@ -57,7 +60,18 @@ class Settings:
     storage_queue_name: str = field(default=AGENT_QUEUE_NAME)
 
 
+# Every Key Vault-backed field, prefetched together at cold start
+_SECRET_NAMES: tuple[str, ...] = (
+    KV_FOUNDRY_PROJECT_ENDPOINT,
+    KV_AI_SEARCH_CONNECTION_ID,
+    KV_AI_SEARCH_INDEX_NAME,
+    KV_MCP_CONNECTION_ID,
+)
+
+
 @lru_cache(maxsize=1)
 def get_settings() -> Settings:
     """Return a cached, frozen Settings instance (created once per process)."""
+    # Fill the secret cache concurrently; the field factories then hit it
+    warm_cache(_SECRET_NAMES)
     return Settings()
@@ -8,14 +8,16 @@ from Settings so secrets never leak into queue messages.
 
 Adding a new tool:
     1. Write a builder function:  ``_build_<name>(settings) -> ToolEntry``
-    2. Register it:  ``TOOL_REGISTRY["<name>"] = _build_<name>``
+    2. Register it:  add ``"<name>": _build_<name>`` to ``_TOOL_REGISTRY``
 """
 
 from __future__ import annotations
 
 import logging
 from dataclasses import dataclass, field
-from typing import Any, Callable
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Callable, Mapping, Sequence
 
 from foundry_agents.configs.settings import Settings, get_settings
 
@@ -24,7 +26,7 @@ logger = logging.getLogger(__name__)
 
 # ─── Data structures ──────────────────────────────────────────
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ToolEntry:
     """Resolved tool ready to be passed to the Agents SDK."""
 
@@ -39,6 +41,12 @@ class ToolEntry:
 ToolBuilder = Callable[[Settings], ToolEntry]
 
 
+# ─── Static tool definitions (shared, read-only) ──────────────
+
+_AI_SEARCH_DEF: dict[str, Any] = {"type": "azure_ai_search"}
+_CODE_INTERPRETER_ENTRY = ToolEntry(tool_def={"type": "code_interpreter"})
+
+
 # ─── Individual tool builders ─────────────────────────────────
 
 def _build_ai_search(settings: Settings) -> ToolEntry:
@@ -50,7 +58,7 @@ def _build_ai_search(settings: Settings) -> ToolEntry:
         )
 
     return ToolEntry(
-        tool_def={"type": "azure_ai_search"},
+        tool_def=_AI_SEARCH_DEF,
         tool_resources={
             "azure_ai_search": {
                 "indexes": [
@@ -83,27 +91,36 @@ def _build_microsoft_learn_mcp(settings: Settings) -> ToolEntry:
 
 def _build_code_interpreter(_settings: Settings) -> ToolEntry:
     """Code Interpreter — sandboxed code execution (no extra config)."""
-    return ToolEntry(tool_def={"type": "code_interpreter"})
+    return _CODE_INTERPRETER_ENTRY
 
 
 # ─── Registry ─────────────────────────────────────────────────
 # Map of short name → builder function.
-# Add new tools here.
+# Add new tools here; the public TOOL_REGISTRY is a read-only view.
 
-TOOL_REGISTRY: dict[str, ToolBuilder] = {
+_TOOL_REGISTRY: dict[str, ToolBuilder] = {
     "ai_search": _build_ai_search,
     "microsoft_learn_mcp": _build_microsoft_learn_mcp,
     "code_interpreter": _build_code_interpreter,
 }
 
+TOOL_REGISTRY: Mapping[str, ToolBuilder] = MappingProxyType(_TOOL_REGISTRY)
+
+# Resolved entries, built once per tool name.  Settings are frozen and cached
+# for the process lifetime, so a builder's output never changes.
+_RESOLVED: dict[str, ToolEntry] = {}
+
 
 # ─── Public API ───────────────────────────────────────────────
 
 def resolve_tools(
-    tool_names: list[str],
+    tool_names: Sequence[str],
 ) -> tuple[list[dict[str, Any]], dict[str, Any]]:
     """
-    Resolve a list of short tool names into SDK-ready structures.
+    Resolve a sequence of short tool names into SDK-ready structures.
+
+    Pass a tuple where possible: it is used as the memoization key as-is,
+    while other sequences are copied into one first.
 
     Returns
     -------
@@ -111,19 +128,47 @@ def resolve_tools(
         The ``tools`` list to pass to ``create_agent()``.
     tool_resources : dict
         The merged ``tool_resources`` dict.
+
+    The result for a given name sequence is computed once and each call
+    gets its own list and top-level dict; the nested resource and tool
+    dicts are shared, so treat them as read-only.  Sequences containing an
+    unknown name are never memoized, so every such job logs the typo.
     """
-    settings = get_settings()
+    if not tool_names:
+        # Common case: no tools, so no cache lookup and no Settings access
+        return [], {}
+    key = tuple(tool_names)
+    if all(name in TOOL_REGISTRY for name in key):
+        tools, tool_resources = _resolve_cached(key)
+    else:
+        tools, tool_resources = _resolve(key)
+    return list(tools), dict(tool_resources)
+
+
+def _resolve(
+    tool_names: tuple[str, ...],
+) -> tuple[tuple[dict[str, Any], ...], dict[str, Any]]:
+    """Build and merge the entries for *tool_names* (order preserved)."""
     tools: list[dict[str, Any]] = []
     tool_resources: dict[str, Any] = {}
 
-    for name in tool_names:
-        builder = TOOL_REGISTRY.get(name)
-        if builder is None:
-            logger.error("Unknown tool '%s' — skipping. Known tools: %s", name, list(TOOL_REGISTRY))
-            continue
+    # Loop-invariant lookups bound to locals once
+    get_resolved = _RESOLVED.get
+    get_builder = TOOL_REGISTRY.get
+    append_tool = tools.append
 
-        entry = builder(settings)
-        tools.append(entry.tool_def)
+    for name in tool_names:
+        entry = get_resolved(name)
+        if entry is None:
+            builder = get_builder(name)
+            if builder is None:
+                logger.error(
+                    "Unknown tool '%s' — skipping. Known tools: %s", name, list(TOOL_REGISTRY)
+                )
+                continue
+            entry = _RESOLVED[name] = builder(get_settings())
+
+        append_tool(entry.tool_def)
 
         # Merge tool_resources (each tool owns a unique top-level key)
         for key, value in entry.tool_resources.items():
@@ -133,9 +178,14 @@ def resolve_tools(
                     existing = tool_resources[key].get(sub_key, [])
                     tool_resources[key][sub_key] = existing + sub_val
             else:
-                tool_resources[key] = value
+                # Copy: the merge above must never write into a cached entry
+                tool_resources[key] = dict(value)
+
+    return tuple(tools), tool_resources
+
 
-    return tools, tool_resources
+# Memoized form of _resolve for sequences made only of known tool names
+_resolve_cached = lru_cache(maxsize=64)(_resolve)
 
 
 def list_available_tools() -> list[str]:
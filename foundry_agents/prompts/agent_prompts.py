@@ -8,10 +8,13 @@ looks up the full prompt text automatically.
 
 from __future__ import annotations
 
+from types import MappingProxyType
+from typing import Mapping
+
 # ────────────────────────────────────────────────────
 # Prompt registry:  agent_name  →  system instructions
 # ────────────────────────────────────────────────────
-AGENT_PROMPTS: dict[str, str] = {
+AGENT_PROMPTS: Mapping[str, str] = MappingProxyType({
     "doc-bot": (
         "You are a documentation assistant. "
         "Use the connected AI Search index to find relevant documentation, "
@@ -26,7 +29,11 @@ AGENT_PROMPTS: dict[str, str] = {
     "default": (
         "You are a helpful AI assistant powered by Azure AI Foundry."
     ),
-}
+})
+
+
+# Bound once so the hit path is a single dict lookup
+_DEFAULT_PROMPT = AGENT_PROMPTS["default"]
 
 
 def get_prompt(agent_name: str) -> str:
@@ -35,4 +42,4 @@ def get_prompt(agent_name: str) -> str:
 
     Falls back to the ``"default"`` prompt when the name is not found.
     """
-    return AGENT_PROMPTS.get(agent_name, AGENT_PROMPTS["default"])
+    return AGENT_PROMPTS.get(agent_name, _DEFAULT_PROMPT)
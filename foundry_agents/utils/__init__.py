@@ -1,6 +1,31 @@
-"""utils — Reusable client factories and helpers."""
+"""utils — Reusable client factories and helpers.
 
-from foundry_agents.utils.foundry_client import get_project_client
-from foundry_agents.utils.akv import get_secret
+Exports are resolved lazily (PEP 562) so importing this package does not
+pull in the Azure SDKs until a factory is actually used.
+"""
 
-__all__ = ["get_project_client", "get_secret"]
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from foundry_agents.utils.akv import get_secret
+    from foundry_agents.utils.foundry_client import get_async_project_client, get_project_client
+
+__all__ = ["get_project_client", "get_async_project_client", "get_secret"]
+
+
+def __getattr__(name: str):
+    if name == "get_project_client":
+        from foundry_agents.utils.foundry_client import get_project_client
+
+        return get_project_client
+    if name == "get_async_project_client":
+        from foundry_agents.utils.foundry_client import get_async_project_client
+
+        return get_async_project_client
+    if name == "get_secret":
+        from foundry_agents.utils.akv import get_secret
+
+        return get_secret
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
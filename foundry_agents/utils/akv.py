@@ -10,30 +10,52 @@ from __future__ import annotations
 
 import logging
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
+from typing import Iterable
 
-from azure.identity import DefaultAzureCredential, ManagedIdentityCredential
 from azure.keyvault.secrets import SecretClient
 
+from foundry_agents.utils.credentials import get_credential
+
 logger = logging.getLogger(__name__)
 
 
+# Read once at import; like the cached client below, changing the
+# environment afterwards requires a process restart.
+_AZURE_CLIENT_ID = os.environ.get("AZURE_CLIENT_ID", "")
+
+
 def _build_credential():
     """Pick the right credential for the runtime environment."""
-    client_id = os.environ.get("AZURE_CLIENT_ID", "")
-    if client_id:
-        return ManagedIdentityCredential(client_id=client_id)
-    return DefaultAzureCredential()
+    return get_credential(_AZURE_CLIENT_ID)
 
 
-@lru_cache(maxsize=1)
-def _get_client() -> SecretClient:
-    """Return a cached SecretClient pointing at the deployed Key Vault."""
-    vault_uri = os.environ["KEY_VAULT_URI"]
-    return SecretClient(vault_url=vault_uri, credential=_build_credential())
+_CLIENT: SecretClient | None = None
+_CLIENT_LOCK = threading.Lock()
 
 
-_secret_cache: dict[str, str] = {}
+def _get_client() -> SecretClient:
+    """Return a cached SecretClient pointing at the deployed Key Vault."""
+    # Plain global rather than lru_cache: this sits on every secret fetch.
+    # Check-then-set is not atomic, so construction is double-checked
+    # under a lock; the hot path stays a single None test.
+    global _CLIENT
+    if _CLIENT is None:
+        with _CLIENT_LOCK:
+            if _CLIENT is None:
+                vault_uri = os.environ["KEY_VAULT_URI"]
+                _CLIENT = SecretClient(vault_url=vault_uri, credential=_build_credential())
+    return _CLIENT
+
+
+@lru_cache(maxsize=256)
+def _fetch(name: str) -> str:
+    """Fetch *name* from Key Vault; memoized per process."""
+    value = _get_client().get_secret(name).value or ""
+    logger.debug("Fetched secret '%s' from Key Vault.", name)
+    return value
 
 
 def get_secret(name: str, *, use_cache: bool = True) -> str:
@@ -46,7 +68,8 @@ def get_secret(name: str, *, use_cache: bool = True) -> str:
         The secret name (e.g. ``"foundry-project-endpoint"``).
     use_cache : bool
         If True (default), return a previously fetched value without
-        another round-trip to KV.
+        another round-trip to KV.  If False, always read from KV (the
+        cached value is left untouched).
 
     Returns
     -------
@@ -58,15 +81,29 @@ def get_secret(name: str, *, use_cache: bool = True) -> str:
     azure.core.exceptions.ResourceNotFoundError
         If the secret does not exist in the vault.
     """
-    if use_cache and name in _secret_cache:
-        return _secret_cache[name]
+    if use_cache:
+        return _fetch(name)
+    return _get_client().get_secret(name).value or ""
 
-    value = _get_client().get_secret(name).value or ""
-    _secret_cache[name] = value
-    logger.debug("Fetched secret '%s' from Key Vault.", name)
-    return value
+
+def warm_cache(names: Iterable[str]) -> None:
+    """
+    Prefetch several secrets concurrently into the cache.
+
+    Cold start then pays for the slowest Key Vault round-trip rather than
+    the sum of them; later ``get_secret`` calls are served from memory.
+    """
+    names = list(names)
+    if not names:
+        return
+    # Build the client (and its credential) once, before the workers race
+    # to do it themselves
+    _get_client()
+    with ThreadPoolExecutor(max_workers=min(8, len(names))) as pool:
+        # Drain the iterator so any fetch error is raised here
+        list(pool.map(_fetch, names))
 
 
 def clear_cache() -> None:
     """Clear the in-process secret cache (useful for testing)."""
-    _secret_cache.clear()
+    _fetch.cache_clear()
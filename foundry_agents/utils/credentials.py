@@ -0,0 +1,162 @@
+"""
+credentials — Token-caching credentials shared by the client factories.
+
+Not every credential in the ``DefaultAzureCredential`` chain caches its
+tokens (``AzureCliCredential`` spawns the CLI on each request), so
+``get_credential()`` wraps whatever it builds in ``CachingCredential``
+(async clients use ``AsyncCachingCredential``).  A token is reused until
+shortly before it expires, and one sync credential (with its transport)
+is kept per managed-identity client id.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any
+
+from azure.core.credentials import AccessToken, TokenCredential
+from azure.core.credentials_async import AsyncTokenCredential
+from azure.identity import DefaultAzureCredential, ManagedIdentityCredential
+
+# Refresh this many seconds before the token actually expires
+REFRESH_MARGIN_SECONDS = 300
+
+
+class CachingCredential:
+    """Delegating ``TokenCredential`` that caches tokens per scope/tenant."""
+
+    def __init__(
+        self,
+        inner: TokenCredential,
+        refresh_margin: int = REFRESH_MARGIN_SECONDS,
+    ) -> None:
+        self._inner = inner
+        self._refresh_margin = refresh_margin
+        self._tokens: dict[tuple[tuple[str, ...], str | None, bool], AccessToken] = {}
+        # Concurrent callers that miss together share one token request
+        self._lock = threading.Lock()
+
+    def get_token(
+        self,
+        *scopes: str,
+        claims: str | None = None,
+        tenant_id: str | None = None,
+        enable_cae: bool = False,
+        **kwargs: Any,
+    ) -> AccessToken:
+        if enable_cae:
+            kwargs["enable_cae"] = True
+        if claims or kwargs.keys() - {"enable_cae"}:
+            # A claims challenge always needs a fresh token, and options we
+            # do not key on must not be answered from the cache
+            return self._inner.get_token(*scopes, claims=claims, tenant_id=tenant_id, **kwargs)
+
+        # CAE and non-CAE tokens are distinct and must not stand in for each other
+        key = (scopes, tenant_id, enable_cae)
+        token = self._tokens.get(key)
+        if token is not None and not self._is_stale(token):
+            return token
+        with self._lock:
+            token = self._tokens.get(key)
+            if token is None or self._is_stale(token):
+                if tenant_id:
+                    kwargs["tenant_id"] = tenant_id
+                token = self._inner.get_token(*scopes, **kwargs)
+                self._tokens[key] = token
+        return token
+
+    def _is_stale(self, token: AccessToken) -> bool:
+        return time.time() >= token.expires_on - self._refresh_margin
+
+    def close(self) -> None:
+        self._inner.close()
+
+    def __enter__(self) -> CachingCredential:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+class AsyncCachingCredential:
+    """Async counterpart of ``CachingCredential`` (same keying and refresh rules)."""
+
+    def __init__(
+        self,
+        inner: AsyncTokenCredential,
+        refresh_margin: int = REFRESH_MARGIN_SECONDS,
+    ) -> None:
+        self._inner = inner
+        self._refresh_margin = refresh_margin
+        self._tokens: dict[tuple[tuple[str, ...], str | None, bool], AccessToken] = {}
+        # Coroutines that miss together await one token request
+        self._lock = asyncio.Lock()
+
+    async def get_token(
+        self,
+        *scopes: str,
+        claims: str | None = None,
+        tenant_id: str | None = None,
+        enable_cae: bool = False,
+        **kwargs: Any,
+    ) -> AccessToken:
+        if enable_cae:
+            kwargs["enable_cae"] = True
+        if claims or kwargs.keys() - {"enable_cae"}:
+            return await self._inner.get_token(
+                *scopes, claims=claims, tenant_id=tenant_id, **kwargs
+            )
+
+        key = (scopes, tenant_id, enable_cae)
+        token = self._tokens.get(key)
+        if token is not None and not self._is_stale(token):
+            return token
+        async with self._lock:
+            token = self._tokens.get(key)
+            if token is None or self._is_stale(token):
+                if tenant_id:
+                    kwargs["tenant_id"] = tenant_id
+                token = await self._inner.get_token(*scopes, **kwargs)
+                self._tokens[key] = token
+        return token
+
+    def _is_stale(self, token: AccessToken) -> bool:
+        return time.time() >= token.expires_on - self._refresh_margin
+
+    async def close(self) -> None:
+        await self._inner.close()
+
+    async def __aenter__(self) -> AsyncCachingCredential:
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
+
+
+# client id ("" = DefaultAzureCredential) → shared credential
+_CRED_POOL: dict[str, CachingCredential] = {}
+_CRED_POOL_LOCK = threading.Lock()
+
+
+def get_credential(client_id: str = "") -> CachingCredential:
+    """
+    Return the process-wide credential for *client_id*.
+
+    • A client id (deployed Function App) → ManagedIdentityCredential for
+      that user-assigned MSI.
+    • Empty (local dev / CI) → DefaultAzureCredential.
+    """
+    credential = _CRED_POOL.get(client_id)
+    if credential is None:
+        with _CRED_POOL_LOCK:
+            credential = _CRED_POOL.get(client_id)
+            if credential is None:
+                inner = (
+                    ManagedIdentityCredential(client_id=client_id)
+                    if client_id
+                    else DefaultAzureCredential()
+                )
+                credential = _CRED_POOL[client_id] = CachingCredential(inner)
+    return credential
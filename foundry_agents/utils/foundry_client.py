@@ -3,19 +3,25 @@ foundry_client — Factory for the Azure AI Projects client.
 
 Centralises credential + client creation so every function / module
 gets the same configured client without duplicating boilerplate.
+Async handlers use ``get_async_project_client()`` (aiohttp transport).
 """
 
 from __future__ import annotations
 
-from functools import lru_cache
+import threading
 
 from azure.ai.projects import AIProjectClient
-from azure.identity import DefaultAzureCredential, ManagedIdentityCredential
+from azure.ai.projects.aio import AIProjectClient as AsyncAIProjectClient
+from azure.identity.aio import (
+    DefaultAzureCredential as AsyncDefaultAzureCredential,
+    ManagedIdentityCredential as AsyncManagedIdentityCredential,
+)
 
-from foundry_agents.configs import get_settings
+from foundry_agents.configs import Settings, get_settings
+from foundry_agents.utils.credentials import AsyncCachingCredential, get_credential
 
 
-def _build_credential():
+def _build_credential(settings: Settings):
     """
     Return the correct credential for the runtime environment.
 
@@ -23,18 +29,59 @@ def _build_credential():
       ManagedIdentityCredential with the explicit client-id so the
       correct user-assigned MSI is picked.
     • Otherwise (local dev / CI) → fall back to DefaultAzureCredential.
+
+    Pooled per client id, so the Key Vault client shares the same one.
     """
-    settings = get_settings()
-    if settings.azure_client_id:
-        return ManagedIdentityCredential(client_id=settings.azure_client_id)
-    return DefaultAzureCredential()
+    return get_credential(settings.azure_client_id)
+
+
+_PROJECT_CLIENT: AIProjectClient | None = None
+_PROJECT_CLIENT_LOCK = threading.Lock()
 
 
-@lru_cache(maxsize=1)
 def get_project_client() -> AIProjectClient:
     """Return a cached AIProjectClient wired to the Foundry project."""
-    settings = get_settings()
-    return AIProjectClient(
-        endpoint=settings.foundry_project_endpoint,
-        credential=_build_credential(),
-    )
+    global _PROJECT_CLIENT
+    if _PROJECT_CLIENT is None:
+        with _PROJECT_CLIENT_LOCK:
+            if _PROJECT_CLIENT is None:
+                settings = get_settings()
+                _PROJECT_CLIENT = AIProjectClient(
+                    endpoint=settings.foundry_project_endpoint,
+                    credential=_build_credential(settings),
+                )
+    return _PROJECT_CLIENT
+
+
+def _build_async_credential(settings: Settings):
+    """Async counterpart of ``_build_credential()`` (same selection rules).
+
+    Built once, by the async client factory; it is wrapped in the same
+    token cache but not pooled, since async credentials belong to the
+    worker's event loop.
+    """
+    if settings.azure_client_id:
+        inner = AsyncManagedIdentityCredential(client_id=settings.azure_client_id)
+    else:
+        inner = AsyncDefaultAzureCredential()
+    return AsyncCachingCredential(inner)
+
+
+_ASYNC_PROJECT_CLIENT: AsyncAIProjectClient | None = None
+_ASYNC_PROJECT_CLIENT_LOCK = threading.Lock()
+
+
+def get_async_project_client() -> AsyncAIProjectClient:
+    """Return a cached async AIProjectClient for ``async def`` triggers."""
+    # Same double-checked global as get_project_client: this is the factory
+    # every agent-creation message (and the start-up warm-up) goes through
+    global _ASYNC_PROJECT_CLIENT
+    if _ASYNC_PROJECT_CLIENT is None:
+        with _ASYNC_PROJECT_CLIENT_LOCK:
+            if _ASYNC_PROJECT_CLIENT is None:
+                settings = get_settings()
+                _ASYNC_PROJECT_CLIENT = AsyncAIProjectClient(
+                    endpoint=settings.foundry_project_endpoint,
+                    credential=_build_async_credential(settings),
+                )
+    return _ASYNC_PROJECT_CLIENT
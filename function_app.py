@@ -1,17 +1,91 @@
 import azure.functions as func
 import logging
-import json
 import os
-from azure.identity import DefaultAzureCredential
-from azure.storage.queue import QueueClient
+from functools import lru_cache
+from azure.core.exceptions import ResourceNotFoundError
+from azure.storage.queue import QueueClient, QueueServiceClient
 from typing import Dict, Any
 
-from foundry_agents.configs import get_settings, resolve_tools
-from foundry_agents.utils import get_project_client
-from foundry_agents.prompts import get_prompt
+import msgspec
+import orjson
+
+# Only the constants are needed at import time; the registry, prompts and
+# the AI Projects client are imported on the first agent-creation message.
+from foundry_agents.configs.constants import DEFAULT_AGENT_MODEL, DEFAULT_AGENT_NAME
+from foundry_agents.utils.credentials import get_credential
 
 app = func.FunctionApp()
 
+logger = logging.getLogger(__name__)
+
+# Requesters may ask for replies on their own short-lived queue; only queues
+# with this prefix are accepted so a message cannot redirect output elsewhere.
+SK_RESPONSE_QUEUE_PREFIX = "sk-agent-response-"
+
+# One credential per worker process, shared with the Key Vault client (the
+# async project client has its own, token-cached too): warm invocations
+# reuse its token cache instead of re-running the chain for every response.  When deployed (AZURE_CLIENT_ID set)
+# only managed identity can succeed, so the chain probes are skipped.
+_credential = get_credential(os.environ.get("AZURE_CLIENT_ID", ""))
+
+
+def _extract_from_uri(queue_uri: str) -> str:
+    """Account name from a queue service URI (https://<account>.queue.core.windows.net)."""
+    return queue_uri.split('//')[1].split('.')[0] if queue_uri else ""
+
+
+# Resolved once at cold start rather than on every invocation
+_RESPONSE_QUEUE_NAME = os.environ.get("SK_AGENT_RESPONSE_QUEUE_NAME", "sk-agent-response-queue")
+_STORAGE_ACCOUNT_NAME = (
+    os.environ.get("AGENT_STORAGE_ACCOUNT__accountname")
+    or _extract_from_uri(os.environ.get("AGENT_STORAGE_ACCOUNT__queueServiceUri", ""))
+)
+
+
+class AgentJob(msgspec.Struct, frozen=True):
+    """Agent creation message, decoded and type-checked in a single pass.
+
+    Frozen (and slotted, like every Struct) so jobs are immutable and hashable.
+    """
+
+    agent_name: str | None = None
+    # Legacy producers send camelCase ``agentName``
+    legacy_agent_name: str | None = msgspec.field(default=None, name="agentName")
+    model: str = DEFAULT_AGENT_MODEL
+    instructions: str | None = None
+    tools: tuple[str, ...] = ()
+
+
+# Built once: the decoder is specialised for AgentJob's fixed schema
+_AGENT_JOB_DECODER = msgspec.json.Decoder(AgentJob)
+
+
+def _dumps(obj) -> str:
+    """Serialize *obj* to a JSON string for the queue SDK (which wants str).
+
+    Every outbound payload (responses, future agent metadata) goes through
+    this helper rather than stdlib ``json``.  orjson produces compact UTF-8
+    bytes; the ``.decode()`` is the only copy and is required because
+    ``QueueClient.send_message`` rejects bytes without an encode policy.
+    """
+    return orjson.dumps(obj).decode()
+
+
+# Opt-in (off by default): build Settings and the shared async project
+# client at import, i.e. while the worker indexes functions.  This imports
+# the Foundry SDK and reads Key Vault during indexing -- giving up the
+# deferred handler imports above -- so the first agent job skips that
+# setup.  Any failure (Key Vault, identity) is logged rather than raised so
+# indexing still succeeds; a failed build caches no client, so the first agent
+# job simply builds the client itself.
+if os.environ.get("FOUNDRY_WARM_CLIENT") == "1":
+    try:
+        from foundry_agents.utils import get_async_project_client
+        get_async_project_client()
+    except Exception as e:
+        logger.warning('Project client warm-up failed, deferring to first use: %s', e)
+
+
 # ══════════════════════════════════════════════
 # QUEUE TRIGGER 1: Agent Creation (AI Projects)
 # ══════════════════════════════════════════════
@@ -21,10 +95,13 @@ app = func.FunctionApp()
     queue_name=os.environ.get("AGENT_CREATION_QUEUE_NAME", "agent-creation-queue"),
     connection="AGENT_STORAGE_ACCOUNT"
 )
-def agent_creation_processor(msg: func.QueueMessage) -> None:
+async def agent_creation_processor(msg: func.QueueMessage) -> None:
     """
     Queue trigger function to create agents using Azure AI Projects SDK.
     
+    Async so a slow create call does not tie up a worker thread; concurrent
+    messages share one async project client on the worker's event loop.
+    
     Expected message format:
     {
         "agent_name": "doc-bot",
@@ -40,33 +117,44 @@ def agent_creation_processor(msg: func.QueueMessage) -> None:
         "models": [...]
     }
     """
-    logging.info('Agent creation job received from queue')
+    from foundry_agents.configs import resolve_tools
+    from foundry_agents.prompts import get_prompt
+    from foundry_agents.utils import get_async_project_client
+    
+    logger.info('Agent creation job received from queue')
     
     try:
-        # Parse the queue message
-        message_body = msg.get_body().decode('utf-8')
-        logging.info(f'Queue message: {message_body}')
+        # Parse the queue message straight from bytes; only decode for logging
+        message_body = msg.get_body()
+        if not message_body or message_body.isspace():
+            # Nothing to decode and nothing a retry could fix
+            logger.error('Empty queue message, dropping it')
+            return
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('Queue message: %s', message_body.decode('utf-8', 'replace'))
         
-        config = json.loads(message_body)
+        job = _AGENT_JOB_DECODER.decode(message_body)
         
         # Support both new format (agent_name) and legacy format (agentName)
-        agent_name = config.get("agent_name") or config.get("agentName", "default-agent")
-        model = config.get("model", "gpt-4.1")
+        agent_name = job.agent_name or job.legacy_agent_name or DEFAULT_AGENT_NAME
+        model = job.model
         
         # Use explicit instructions from the message, or fall back to the prompt registry
-        instructions = config.get("instructions") or get_prompt(agent_name)
-        tool_names = config.get("tools", [])
+        instructions = job.instructions or get_prompt(agent_name)
+        tool_names = job.tools
         
-        logging.info(f'Creating agent: {agent_name} with model: {model}')
-        logging.info(f'Tools requested: {tool_names}')
+        logger.info('Creating agent: %s with model: %s', agent_name, model)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Tools requested: %s', tool_names)
         
-        # Resolve tools via the registry (connection IDs pulled from Settings)
+        # Resolve tools via the registry (connection IDs pulled from Settings);
+        # job.tools is already a tuple, i.e. the memoization key as-is
         tools, tool_resources = resolve_tools(tool_names)
         
-        # Create the agent via the shared client
-        project_client = get_project_client()
+        # Create the agent via the shared async client
+        project_client = get_async_project_client()
         
-        agent = project_client.agents.create_agent(
+        agent = await project_client.agents.create_agent(
             model=model,
             name=agent_name,
             instructions=instructions,
@@ -74,16 +162,21 @@ def agent_creation_processor(msg: func.QueueMessage) -> None:
             tool_resources=tool_resources,
         )
         
-        logging.info(f'Agent created successfully: {agent.id} ({agent_name})')
+        logger.info('Agent created successfully: %s (%s)', agent.id, agent_name)
         
-    except json.JSONDecodeError as e:
-        logging.error(f'Invalid JSON in queue message: {e}')
-        raise
+    except msgspec.ValidationError as e:
+        # Schema errors are permanent: retrying would only fail the same way
+        logger.error('Validation error, dropping message: %s', e)
+        return
+    except msgspec.DecodeError as e:
+        # So is malformed JSON: the body is identical on every redelivery
+        logger.error('Invalid JSON in queue message, dropping it: %s', e)
+        return
     except ValueError as e:
-        logging.error(f'Validation error: {e}')
+        logger.error('Validation error: %s', e)
         raise
     except Exception as e:
-        logging.error(f'Error processing agent creation request: {e}')
+        logger.error('Error processing agent creation request: %s', e)
         raise
 
 
@@ -106,9 +199,13 @@ def sk_agent_processor(msg: func.QueueMessage) -> None:
     {
         "requestId": "unique-id",
         "query": "What is the current time?",
-        "requester": "foundry-agent-name"
+        "requester": "foundry-agent-name",
+        "responseQueue": "sk-agent-response-<requestId>"  (optional)
     }
     
+    When ``responseQueue`` is present (and carries the per-request prefix)
+    the response is sent there instead of the shared response queue.
+    
     Response format (sent to response queue):
     {
         "requestId": "unique-id",
@@ -120,24 +217,28 @@ def sk_agent_processor(msg: func.QueueMessage) -> None:
         }
     }
     """
-    logging.info('SK Agent: Processing request from queue')
+    logger.info('SK Agent: Processing request from queue')
     
     try:
-        # Parse the queue message
-        message_body = msg.get_body().decode('utf-8')
-        logging.info(f'Request message: {message_body}')
+        # Parse the queue message straight from bytes; only decode for logging
+        message_body = msg.get_body()
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('Request message: %s', message_body.decode('utf-8', 'replace'))
         
-        request_data = json.loads(message_body)
+        request_data = orjson.loads(message_body)
+        if not isinstance(request_data, dict):
+            raise ValueError('Request message must be a JSON object')
         
         # Validate required fields
-        if 'requestId' not in request_data or 'query' not in request_data:
-            raise ValueError('Missing required fields: requestId and/or query')
+        try:
+            request_id = request_data['requestId']
+            query = request_data['query']
+        except KeyError:
+            raise ValueError('Missing required fields: requestId and/or query') from None
         
-        request_id = request_data['requestId']
-        query = request_data['query']
         requester = request_data.get('requester', 'unknown')
         
-        logging.info(f'Processing request {request_id} from {requester}: {query}')
+        logger.info('Processing request %s from %s: %s', request_id, requester, query)
         
         # TODO: Implement Semantic Kernel agent logic
         # This is where you'll:
@@ -191,47 +292,81 @@ def sk_agent_processor(msg: func.QueueMessage) -> None:
             }
         }
         
-        # Send response to response queue
-        response_queue_name = os.environ.get("SK_AGENT_RESPONSE_QUEUE_NAME", "sk-agent-response-queue")
+        # Send response to the requester's queue, or the shared response queue
+        response_queue_name = request_data.get('responseQueue')
+        if (
+            not isinstance(response_queue_name, str)
+            or not response_queue_name.startswith(SK_RESPONSE_QUEUE_PREFIX)
+        ):
+            response_queue_name = _RESPONSE_QUEUE_NAME
         send_response_to_queue(response_data, response_queue_name)
         
-        logging.info(f'Successfully processed request {request_id} and sent response')
+        logger.info('Successfully processed request %s and sent response', request_id)
         
-    except json.JSONDecodeError as e:
-        logging.error(f'Invalid JSON in queue message: {e}')
+    except orjson.JSONDecodeError as e:
+        logger.error('Invalid JSON in queue message: %s', e)
         raise
     except ValueError as e:
-        logging.error(f'Validation error: {e}')
+        logger.error('Validation error: %s', e)
         raise
     except Exception as e:
-        logging.error(f'Error processing SK agent request: {e}')
+        logger.error('Error processing SK agent request: %s', e)
         raise
 
 
+# Sends are bounded inside the SDK (socket timeouts, server-side timeout, a
+# short retry budget) so that when send_response_to_queue raises, the PUT
+# has really been abandoned and a redelivery cannot post a second reply.
+_SEND_TIMEOUT_SECONDS = 5
+_SEND_RETRY_TOTAL = 2
+
+
+@lru_cache(maxsize=1)
+def _get_queue_service() -> QueueServiceClient:
+    """Storage queue service client shared by every response send."""
+    return QueueServiceClient(
+        account_url=f"https://{_STORAGE_ACCOUNT_NAME}.queue.core.windows.net",
+        credential=_credential,
+        connection_timeout=_SEND_TIMEOUT_SECONDS,
+        read_timeout=_SEND_TIMEOUT_SECONDS,
+        retry_total=_SEND_RETRY_TOTAL
+    )
+
+
+@lru_cache(maxsize=32)
+def _get_queue_client(queue_name: str) -> QueueClient:
+    """Cached per-queue client; all of them share the service's connection pool.
+
+    Bounded because per-request response queues each have a unique name.
+    """
+    return _get_queue_service().get_queue_client(queue_name)
+
+
 def send_response_to_queue(response_data: Dict[str, Any], queue_name: str) -> None:
     """Send response message to the response queue."""
     try:
-        storage_account_name = os.environ.get("AGENT_STORAGE_ACCOUNT__accountname")
-        if not storage_account_name:
-            # Extract from queueServiceUri
-            queue_uri = os.environ.get("AGENT_STORAGE_ACCOUNT__queueServiceUri", "")
-            # Format: https://<account>.queue.core.windows.net
-            if queue_uri:
-                storage_account_name = queue_uri.split('//')[1].split('.')[0]
-        
-        credential = DefaultAzureCredential()
-        queue_client = QueueClient(
-            account_url=f"https://{storage_account_name}.queue.core.windows.net",
-            queue_name=queue_name,
-            credential=credential
-        )
+        queue_client = _get_queue_client(queue_name)
         
-        message_json = json.dumps(response_data)
-        queue_client.send_message(message_json)
+        message_json = _dumps(response_data)
+        queue_client.send_message(message_json, timeout=_SEND_TIMEOUT_SECONDS)
         
-        logging.info(f'Response sent to queue {queue_name}: requestId={response_data.get("requestId")}')
+        logger.info(
+            'Response sent to queue %s: requestId=%s', queue_name, response_data.get('requestId')
+        )
         
+    except ResourceNotFoundError:
+        # The shared queue carries the same prefix; it must exist, so retry
+        if (
+            queue_name == _RESPONSE_QUEUE_NAME
+            or not queue_name.startswith(SK_RESPONSE_QUEUE_PREFIX)
+        ):
+            raise
+        # The requester deletes its per-request queue when it gives up; a
+        # late reply has nobody to go to, and retrying would only repeat it
+        logger.warning(
+            'Response queue %s is gone (requester timed out), dropping requestId=%s',
+            queue_name, response_data.get('requestId')
+        )
     except Exception as e:
-        logging.error(f'Error sending response to queue: {e}')
+        logger.error('Error sending response to queue: %s', e)
         raise
-
@@ -4,15 +4,45 @@ Smart Function App Deployment
 Handles temporary storage configuration for deployment, then restores to MSI-only
 """
 
+import argparse
+import asyncio
+import atexit
+import json
+import os
+import shutil
 import subprocess
 import sys
-from typing import Optional
+from pathlib import Path
+from typing import Dict, List, Optional
 
-def run_command(cmd: list, description: str = "", check: bool = True) -> subprocess.CompletedProcess:
-    """Run a shell command"""
+# Resolve the az executable once instead of a PATH search per subprocess
+AZ = shutil.which("az") or "az"
+
+# Keep az quiet and cheap: no telemetry upload, no progress bar
+AZ_ENV = {
+    "AZURE_CORE_COLLECT_TELEMETRY": "0",
+    "AZURE_CORE_DISABLE_PROGRESS_BAR": "true",
+    **os.environ,
+}
+
+def az_cmd(*args: str) -> List[str]:
+    """Build an az command line with upgrade/warning chatter suppressed"""
+    return [AZ, *args, "--only-show-errors"]
+
+async def _run(cmd: list, description: str, check: bool, capture: bool) -> subprocess.CompletedProcess:
+    """Run a shell command without blocking the event loop"""
     if description:
         print(f"[INFO] {description}")
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE if capture else asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+        env=AZ_ENV
+    )
+    stdout, stderr = await proc.communicate()
+    result = subprocess.CompletedProcess(
+        cmd, proc.returncode, stdout.decode().strip() if capture else None, stderr.decode()
+    )
     if result.returncode != 0 and check:
         print(f"[ERROR] Command failed: {' '.join(cmd)}")
         if result.stderr:
@@ -20,38 +50,177 @@ def run_command(cmd: list, description: str = "", check: bool = True) -> subproc
         sys.exit(1)
     return result
 
-def get_storage_connection_string(storage_account_name: str, resource_group: str) -> str:
-    """Get storage account connection string"""
-    result = run_command(
-        ["az", "storage", "account", "show-connection-string",
-         "--name", storage_account_name,
-         "--resource-group", resource_group,
-         "--output", "tsv"],
-        description=f"Getting connection string for {storage_account_name}..."
+async def run_command_checked(cmd: list, description: str = "") -> None:
+    """Run a command whose output is not needed; exit on failure"""
+    await _run(cmd, description, check=True, capture=False)
+
+async def run_command_capture(cmd: list, description: str = "", check: bool = True) -> subprocess.CompletedProcess:
+    """Run a command and keep its (stripped) stdout for parsing"""
+    return await _run(cmd, description, check=check, capture=True)
+
+async def get_storage_connection_string(storage_account_name: str, resource_group: str) -> str:
+    """Get storage account connection string (built locally from the primary key)"""
+    # `show-connection-string` issues an extra account GET on top of the
+    # list-keys call; only the key is needed to assemble the string.  The
+    # endpoint suffix comes from the active cloud (local CLI config, no
+    # request) so sovereign / government clouds get the right one.
+    key_result, suffix_result = await asyncio.gather(
+        run_command_capture(
+            az_cmd("storage", "account", "keys", "list",
+                   "--account-name", storage_account_name,
+                   "--resource-group", resource_group,
+                   "--query", "[0].value",
+                   "--output", "tsv"),
+            description=f"Getting connection string for {storage_account_name}..."
+        ),
+        run_command_capture(
+            az_cmd("cloud", "show",
+                   "--query", "suffixes.storageEndpoint",
+                   "--output", "tsv")
+        ),
     )
-    return result.stdout.strip()
-
-def set_app_setting(function_app: str, resource_group: str, key: str, value: str):
-    """Set function app application setting"""
-    run_command(
-        ["az", "functionapp", "config", "appsettings", "set",
-         "--name", function_app,
-         "--resource-group", resource_group,
-         "--settings", f"{key}={value}"],
-        description=f"Setting {key}..."
+    return (
+        "DefaultEndpointsProtocol=https;"
+        f"AccountName={storage_account_name};"
+        f"AccountKey={key_result.stdout};"
+        f"EndpointSuffix={suffix_result.stdout}"
     )
 
-def delete_app_setting(function_app: str, resource_group: str, key: str):
-    """Delete function app application setting"""
-    run_command(
-        ["az", "functionapp", "config", "appsettings", "delete",
-         "--name", function_app,
-         "--resource-group", resource_group,
-         "--setting-names", key],
-        description=f"Removing {key}..."
+async def get_app_settings(function_app: str, resource_group: str) -> Dict[str, str]:
+    """Fetch all function app application settings in one call"""
+    result = await run_command_capture(
+        az_cmd("functionapp", "config", "appsettings", "list",
+               "--name", function_app,
+               "--resource-group", resource_group,
+               "-o", "json")
     )
+    return {s["name"]: s["value"] for s in json.loads(result.stdout or "[]")}
 
-def deploy_function_app(function_app: str, build_option: str = "native-deps") -> bool:
+async def set_app_settings(function_app: str, resource_group: str, settings: Dict[str, str]):
+    """Set several function app application settings in a single ARM update"""
+    await run_command_checked(
+        az_cmd("functionapp", "config", "appsettings", "set",
+               "--name", function_app,
+               "--resource-group", resource_group,
+               "--settings", *(f"{key}={value}" for key, value in settings.items())),
+        description=f"Setting {', '.join(settings)}..."
+    )
+
+async def wait_for_scm_setting(function_app: str, resource_group: str, key: str, expected_value: str, timeout: float = 60) -> bool:
+    """Poll the SCM (Kudu) site until its restarted process reports the new setting value
+
+    The ARM settings list is read-after-write consistent and says nothing
+    about the restart; Kudu's /api/settings is served by the SCM process
+    that `func publish` talks to, so it only shows the value once that
+    process has come back with the new configuration.
+    """
+    host = await run_command_capture(
+        az_cmd("functionapp", "show",
+               "--name", function_app,
+               "--resource-group", resource_group,
+               "--query", "enabledHostNames[?contains(@, '.scm.')] | [0]",
+               "-o", "tsv"),
+        check=False
+    )
+    if host.returncode != 0 or not host.stdout:
+        return False
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    attempt = 0
+    while True:
+        # Fails (non-zero exit) while the SCM site is restarting
+        result = await run_command_capture(
+            az_cmd("rest", "--method", "get",
+                   "--url", f"https://{host.stdout}/api/settings",
+                   "--resource", "https://management.azure.com/",
+                   "--query", key,
+                   "-o", "tsv"),
+            check=False
+        )
+        if result.returncode == 0 and result.stdout == expected_value:
+            return True
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return False
+        await asyncio.sleep(min(0.5 * 2 ** attempt, 4, remaining))
+        attempt += 1
+
+def storage_access_cmd(storage_account: str, resource_group: str, enabled: bool) -> List[str]:
+    """az command toggling storage account public network access"""
+    return az_cmd("storage", "account", "update",
+                  "--name", storage_account,
+                  "--resource-group", resource_group,
+                  "--public-network-access", "Enabled" if enabled else "Disabled",
+                  "--default-action", "Allow" if enabled else "Deny")
+
+def functionapp_access_cmd(function_app: str, resource_group: str, enabled: bool) -> List[str]:
+    """az command toggling function app public network access"""
+    return az_cmd("functionapp", "update",
+                  "--name", function_app,
+                  "--resource-group", resource_group,
+                  "--set", f"publicNetworkAccess={'Enabled' if enabled else 'Disabled'}")
+
+def delete_settings_cmd(function_app: str, resource_group: str, keys: List[str]) -> List[str]:
+    """az command deleting several app settings in a single ARM update"""
+    return az_cmd("functionapp", "config", "appsettings", "delete",
+                  "--name", function_app,
+                  "--resource-group", resource_group,
+                  "--setting-names", *keys)
+
+async def set_storage_public_access(storage_account: str, resource_group: str, enabled: bool) -> None:
+    """Toggle storage account public network access"""
+    await run_command_checked(
+        storage_access_cmd(storage_account, resource_group, enabled),
+        description=f"{'Enabling' if enabled else 'Disabling'} storage network access..."
+    )
+
+async def set_functionapp_public_access(function_app: str, resource_group: str, enabled: bool) -> None:
+    """Toggle function app public network access"""
+    await run_command_checked(
+        functionapp_access_cmd(function_app, resource_group, enabled),
+        description=f"{'Enabling' if enabled else 'Disabling'} function app network access..."
+    )
+
+def cleanup(function_app: str, resource_group: str, storage_account: str, setting_names: List[str]) -> bool:
+    """
+    Remove deployment-only settings and restore private access.
+    
+    Registered with atexit as soon as public access is opened, so it also
+    runs when the script exits early (sys.exit, exceptions, Ctrl+C). The
+    three az calls are independent and run concurrently.
+    """
+    print("\n[INFO] Cleaning up deployment configuration...")
+    cmds = [
+        delete_settings_cmd(function_app, resource_group, setting_names),
+        storage_access_cmd(storage_account, resource_group, enabled=False),
+        functionapp_access_cmd(function_app, resource_group, enabled=False),
+    ]
+    procs = [
+        subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, env=AZ_ENV)
+        for cmd in cmds
+    ]
+    failed = False
+    for cmd, proc in zip(cmds, procs):
+        _, stderr = proc.communicate()
+        if proc.returncode != 0:
+            failed = True
+            print(f"[ERROR] Command failed: {' '.join(cmd)}")
+            if stderr:
+                print(f"Error output:\n{stderr}")
+    
+    if not failed:
+        print("[INFO] Removed connection string.")
+        print("[INFO] Restored storage to managed identity-only access.")
+        print("[INFO] Restored function app to private access.")
+        return True
+    
+    print(f"[WARNING] Cleanup incomplete. Please restore manually:")
+    for cmd in cmds:
+        print(f"  {' '.join(cmd)}")
+    return False
+
+async def deploy_function_app(function_app: str, build_option: str = "native-deps") -> bool:
     """Deploy function app using func CLI"""
     if build_option == "remote":
         cmd = ["func", "azure", "functionapp", "publish", function_app,
@@ -61,39 +230,67 @@ def deploy_function_app(function_app: str, build_option: str = "native-deps") ->
                "--python", f"--build-{build_option}"]
     
     print(f"\n[INFO] Deploying function app with build option: {build_option}...")
-    # Wait a bit for storage settings to propagate
-    import time
-    time.sleep(5)
-    result = subprocess.run(cmd)
-    return result.returncode == 0
-
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python3 deploy-function.py <function-app-name> [resource-group-name] [--build-remote|--build-native-deps]")
-        print("Example: python3 deploy-function.py ranger-bls-sweden-func ranger-bls-sweden-rg --build-remote")
-        sys.exit(1)
-    
-    function_app = sys.argv[1]
-    resource_group = sys.argv[2] if len(sys.argv) > 2 and not sys.argv[2].startswith('--') else None
-    build_option = "remote"  # Default to remote build
+    proc = await asyncio.create_subprocess_exec(*cmd)
+    return await proc.wait() == 0
+
+def read_local_resource_group(root: Path = Path(".")) -> Optional[str]:
+    """Resource group from the local azd environment, without calling Azure
     
-    # Parse build option
-    for arg in sys.argv:
-        if arg == "--build-remote":
-            build_option = "remote"
-        elif arg == "--build-native-deps":
-            build_option = "native-deps"
+    Reads `.azure/config.json` for the default environment, then looks for
+    AZURE_RESOURCE_GROUP in that environment's `.env` file.
+    """
+    try:
+        config = json.loads((root / ".azure" / "config.json").read_text())
+        env_file = root / ".azure" / config["defaultEnvironment"] / ".env"
+        lines = env_file.read_text().splitlines()
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    for line in lines:
+        key, sep, value = line.partition("=")
+        if sep and key.strip() == "AZURE_RESOURCE_GROUP":
+            return value.strip().strip('"') or None
+    return None
+
+def parse_args() -> argparse.Namespace:
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Deploy function app code, temporarily opening storage/network access",
+        epilog="Example: python3 deploy-function.py ranger-bls-sweden-func ranger-bls-sweden-rg --build remote"
+    )
+    parser.add_argument("function_app", help="Function app name")
+    parser.add_argument("resource_group", nargs="?", default=None,
+                        help="Resource group name (default: $AZURE_RESOURCE_GROUP, the azd "
+                             "environment, or inferred from the function app)")
+    build = parser.add_mutually_exclusive_group()
+    build.add_argument("--build", choices=["remote", "native-deps"], default="remote",
+                       help="Build option passed to func publish (default: remote)")
+    build.add_argument("--build-remote", dest="build", action="store_const", const="remote",
+                       help="Shorthand for --build remote")
+    build.add_argument("--build-native-deps", dest="build", action="store_const", const="native-deps",
+                       help="Shorthand for --build native-deps")
+    return parser.parse_args()
+
+async def main():
+    args = parse_args()
+    function_app = args.function_app
+    build_option = args.build
+    # Cheap local sources first; only ask Azure when none of them know
+    resource_group = (
+        args.resource_group
+        or os.environ.get("AZURE_RESOURCE_GROUP")
+        or read_local_resource_group()
+    )
     
     if not resource_group:
         # Try to infer resource group from app
         print("[INFO] Inferring resource group from function app...")
-        result = run_command(
-            ["az", "functionapp", "show", "--name", function_app,
-             "--query", "resourceGroup", "-o", "tsv"],
+        result = await run_command_capture(
+            az_cmd("functionapp", "show", "--name", function_app,
+                   "--query", "resourceGroup", "-o", "tsv"),
             check=False
         )
         if result.returncode == 0:
-            resource_group = result.stdout.strip()
+            resource_group = result.stdout
         else:
             print("[ERROR] Could not find function app. Please provide resource group name.")
             sys.exit(1)
@@ -103,16 +300,11 @@ def main():
     print(f"Resource Group: {resource_group}")
     print(f"{'='*60}\n")
     
-    # Get storage account name from function app settings
+    # Fetch the settings bag once; the storage account name comes from it and
+    # every later mutation is computed locally against this snapshot.
     print("[INFO] Getting function app storage account...")
-    result = run_command(
-        ["az", "functionapp", "config", "appsettings", "list",
-         "--name", function_app,
-         "--resource-group", resource_group,
-         "--query", "[?name=='AzureWebJobsStorage__accountName'].value | [0]",
-         "-o", "tsv"]
-    )
-    storage_account = result.stdout.strip()
+    app_settings = await get_app_settings(function_app, resource_group)
+    storage_account = app_settings.get("AzureWebJobsStorage__accountName", "").strip()
     
     if not storage_account:
         print("[ERROR] Could not find storage account name in function app settings.")
@@ -120,77 +312,41 @@ def main():
     
     print(f"[INFO] Storage account: {storage_account}\n")
     
-    # Step 1: Temporarily enable storage account public access
-    print("[INFO] Temporarily enabling storage account public access...")
-    run_command(
-        ["az", "storage", "account", "update",
-         "--name", storage_account,
-         "--resource-group", resource_group,
-         "--public-network-access", "Enabled",
-         "--default-action", "Allow"],
-        description="Enabling storage network access..."
-    )
+    # From here on the resources may be publicly reachable; make sure they are
+    # locked down again however the script exits.
+    deploy_setting_names = ["AzureWebJobsStorage"]
+    atexit.register(cleanup, function_app, resource_group, storage_account, deploy_setting_names)
     
-    # Step 1b: Temporarily enable function app public access
-    print("[INFO] Temporarily enabling function app public access...")
-    run_command(
-        ["az", "functionapp", "update",
-         "--name", function_app,
-         "--resource-group", resource_group,
-         "--set", "publicNetworkAccess=Enabled"],
-        description="Enabling function app network access..."
+    # Step 1: Temporarily enable storage + function app public access.
+    # The two updates touch independent resources, so run them concurrently.
+    print("[INFO] Temporarily enabling storage account and function app public access...")
+    await asyncio.gather(
+        set_storage_public_access(storage_account, resource_group, enabled=True),
+        set_functionapp_public_access(function_app, resource_group, enabled=True),
     )
     
     # Step 2: Get connection string
-    conn_string = get_storage_connection_string(storage_account, resource_group)
+    conn_string = await get_storage_connection_string(storage_account, resource_group)
     
-    # Step 3: Set connection string for deployment
+    # Step 3: Set connection string for deployment (skipped if already current)
     print("\n[INFO] Configuring storage for deployment...")
-    set_app_setting(function_app, resource_group, "AzureWebJobsStorage", conn_string)
-    
-    # Wait for settings to propagate
-    print("[INFO] Waiting for settings to propagate...")
-    import time
-    time.sleep(10)
+    deploy_settings = {"AzureWebJobsStorage": conn_string}
+    pending = {k: v for k, v in deploy_settings.items() if app_settings.get(k) != v}
+    if pending:
+        await set_app_settings(function_app, resource_group, pending)
+
+        # Wait until the restarted SCM site serves the new setting
+        print("[INFO] Waiting for settings to propagate...")
+        if not await wait_for_scm_setting(function_app, resource_group, "AzureWebJobsStorage", conn_string):
+            print("[WARNING] SCM site has not picked up AzureWebJobsStorage yet - continuing with deployment.")
     
     # Step 4: Deploy
     print()
-    success = deploy_function_app(function_app, build_option)
+    success = await deploy_function_app(function_app, build_option)
     
-    # Step 5: Clean up - restore restrictions
-    print("\n[INFO] Cleaning up deployment configuration...")
-    try:
-        # Remove connection string
-        delete_app_setting(function_app, resource_group, "AzureWebJobsStorage")
-        print("[INFO] Removed connection string.")
-        
-        # Re-disable storage account public access
-        print("[INFO] Restoring storage account to private access...")
-        run_command(
-            ["az", "storage", "account", "update",
-             "--name", storage_account,
-             "--resource-group", resource_group,
-             "--public-network-access", "Disabled",
-             "--default-action", "Deny"],
-            description="Disabling storage network access..."
-        )
-        print("[INFO] Restored storage to managed identity-only access.")
-        
-        # Re-disable function app public access
-        print("[INFO] Restoring function app to private access...")
-        run_command(
-            ["az", "functionapp", "update",
-             "--name", function_app,
-             "--resource-group", resource_group,
-             "--set", "publicNetworkAccess=Disabled"],
-            description="Disabling function app network access..."
-        )
-        print("[INFO] Restored function app to private access.")
-    except Exception as e:
-        print(f"[WARNING] Cleanup incomplete. Please restore manually:")
-        print(f"  az functionapp config appsettings delete --name {function_app} --resource-group {resource_group} --setting-names AzureWebJobsStorage")
-        print(f"  az storage account update --name {storage_account} --resource-group {resource_group} --public-network-access Disabled --default-action Deny")
-        print(f"  az functionapp update --name {function_app} --resource-group {resource_group} --set publicNetworkAccess=Disabled")
+    # Step 5: Clean up - restore restrictions (now, rather than at exit)
+    atexit.unregister(cleanup)
+    cleanup(function_app, resource_group, storage_account, deploy_setting_names)
     
     print(f"\n{'='*60}")
     if success:
@@ -204,4 +360,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -32,8 +32,8 @@ def print_warning(msg: str):
 def print_error(msg: str):
     print(f"{RED}[ERROR]{NC} {msg}")
 
-def run_command(cmd: List[str], description: str = "", check: bool = True) -> subprocess.CompletedProcess:
-    """Run a shell command and handle errors"""
+def run_capture(cmd: List[str], description: str = "", check: bool = True) -> subprocess.CompletedProcess:
+    """Run a short query command, capturing its output for parsing"""
     if description:
         print_info(description)
     
@@ -53,27 +53,44 @@ def run_command(cmd: List[str], description: str = "", check: bool = True) -> su
         print_error(f"Failed to run command: {e}")
         sys.exit(1)
 
+def run_stream(cmd: List[str], description: str = "", check: bool = True) -> int:
+    """Run a long command with output streamed straight to the terminal"""
+    if description:
+        print_info(description)
+    
+    try:
+        returncode = subprocess.run(cmd, check=False).returncode
+    except Exception as e:
+        print_error(f"Failed to run command: {e}")
+        sys.exit(1)
+    
+    if returncode != 0 and check:
+        print_error(f"Command failed: {' '.join(cmd)}")
+        sys.exit(1)
+    
+    return returncode
+
 def check_azure_cli():
     """Check if Azure CLI is installed and user is logged in"""
-    result = run_command(["az", "--version"], check=False)
+    result = run_capture(["az", "--version"], check=False)
     if result.returncode != 0:
         print_error("Azure CLI is not installed. Please install it from https://docs.microsoft.com/en-us/cli/azure/install-azure-cli")
         sys.exit(1)
     
-    result = run_command(["az", "account", "show"], description="Checking Azure CLI login status...", check=False)
+    result = run_capture(["az", "account", "show"], description="Checking Azure CLI login status...", check=False)
     if result.returncode != 0:
         print_warning("Not logged in to Azure. Logging in...")
-        run_command(["az", "login"], description="Logging in to Azure...")
+        run_stream(["az", "login"], description="Logging in to Azure...")
 
 def get_subscription_info() -> tuple:
     """Get current Azure subscription info"""
-    result = run_command(
+    result = run_capture(
         ["az", "account", "show", "--query", "name", "-o", "tsv"],
         check=True
     )
     subscription_name = result.stdout.strip()
     
-    result = run_command(
+    result = run_capture(
         ["az", "account", "show", "--query", "id", "-o", "tsv"],
         check=True
     )
@@ -101,6 +118,28 @@ def create_params_file(environment: str, location: str, github_repo: str = '', g
     
     return str(params_file)
 
+# Outputs of main.bicep that the rest of the deployment relies on
+DEPLOYMENT_OUTPUT_KEYS = (
+    "resourceGroupName",
+    "functionAppName",
+    "agentStorageAccountName",
+    "agentCreationQueueName",
+    "skAgentRequestQueueName",
+    "skAgentResponseQueueName",
+    "appInsightsName",
+)
+
+def get_deployment_outputs(deployment_name: str) -> Dict[str, str]:
+    """Fetch all outputs of a subscription deployment in a single az call"""
+    result = run_capture(
+        ["az", "deployment", "sub", "show", "--name", deployment_name,
+         "--query", "properties.outputs", "-o", "json"],
+        check=True
+    )
+    raw = json.loads(result.stdout or "null") or {}
+    # Missing outputs come back empty, as the old per-key tsv queries did
+    return {key: str((raw.get(key) or {}).get("value") or "") for key in DEPLOYMENT_OUTPUT_KEYS}
+
 def deploy_infrastructure(environment: str, location: str, deployment_name: Optional[str] = None, 
                          github_repo: str = '', github_branch: str = 'main', enable_github: bool = False) -> Dict:
     """Deploy infrastructure using Bicep template"""
@@ -137,31 +176,14 @@ def deploy_infrastructure(environment: str, location: str, deployment_name: Opti
         "--output", "table"
     ]
     
-    run_command(cmd, description="Deploying infrastructure...")
+    run_stream(cmd, description="Deploying infrastructure...")
     
     print_info("Infrastructure deployment completed successfully!")
     print()
     
     # Get deployment outputs
     print_info("Retrieving deployment outputs...")
-    outputs = {}
-    
-    output_queries = {
-        "resourceGroupName": "properties.outputs.resourceGroupName.value",
-        "functionAppName": "properties.outputs.functionAppName.value",
-        "agentStorageAccountName": "properties.outputs.agentStorageAccountName.value",
-        "agentCreationQueueName": "properties.outputs.agentCreationQueueName.value",
-        "skAgentRequestQueueName": "properties.outputs.skAgentRequestQueueName.value",
-        "skAgentResponseQueueName": "properties.outputs.skAgentResponseQueueName.value",
-        "appInsightsName": "properties.outputs.appInsightsName.value",
-    }
-    
-    for key, query in output_queries.items():
-        result = run_command(
-            ["az", "deployment", "sub", "show", "--name", deployment_name, "--query", query, "-o", "tsv"],
-            check=True
-        )
-        outputs[key] = result.stdout.strip()
+    outputs = get_deployment_outputs(deployment_name)
     
     print_info("Deployment outputs:")
     for key, value in outputs.items():
@@ -181,7 +203,7 @@ def deploy_function_code(function_app_name: str, resource_group_name: str):
         "--python", "--build-native-deps"
     ]
     
-    run_command(cmd, description="Publishing function code...")
+    run_stream(cmd, description="Publishing function code...")
     print_info("Function code deployment completed successfully!")
 
 def main():
@@ -227,19 +249,9 @@ def main():
         
         # Get outputs from previous deployment
         print_info("Retrieving previous deployment outputs...")
-        result = run_command(
-            ["az", "deployment", "sub", "show", "--name", args.name, "--query", 
-             "properties.outputs.functionAppName.value", "-o", "tsv"],
-            check=True
-        )
-        function_app_name = result.stdout.strip()
-        
-        result = run_command(
-            ["az", "deployment", "sub", "show", "--name", args.name, "--query", 
-             "properties.outputs.resourceGroupName.value", "-o", "tsv"],
-            check=True
-        )
-        resource_group_name = result.stdout.strip()
+        outputs = get_deployment_outputs(args.name)
+        function_app_name = outputs["functionAppName"]
+        resource_group_name = outputs["resourceGroupName"]
         
         deploy_function_code(function_app_name, resource_group_name)
     else:
@@ -3,7 +3,9 @@
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 import sys
+from collections.abc import Mapping
 from pathlib import Path
+from types import SimpleNamespace
 
 # Add foundry_agents to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -48,22 +50,100 @@ class TestSettings:
             settings = get_settings()
             assert settings is not None
             assert hasattr(settings, 'foundry_project_endpoint')
+    
+    def test_settings_is_slotted_and_hashable(self):
+        """Test that Settings stays a lightweight, hashable value object"""
+        from foundry_agents.configs.settings import Settings
+
+        settings = Settings(
+            foundry_project_endpoint='https://test.cognitiveservices.azure.com/',
+            ai_search_connection_id='test-search',
+            ai_search_index_name='test-index',
+            mcp_connection_id='test-mcp'
+        )
+
+        assert not hasattr(settings, '__dict__')
+        assert hash(settings) == hash(Settings(**{
+            name: getattr(settings, name) for name in Settings.__slots__
+        }))
+
+    def test_get_settings_loads_all_secrets(self):
+        """Test that get_settings fills every Key Vault field in one pass"""
+        from foundry_agents.configs import settings as settings_module
+
+        settings_module.get_settings.cache_clear()
+        with patch.object(settings_module, 'warm_cache') as mock_warm, \
+                patch.object(settings_module, 'get_secret', side_effect=lambda name: f'value-of-{name}') as mock_get:
+            settings = settings_module.get_settings()
+        settings_module.get_settings.cache_clear()
+
+        mock_warm.assert_called_once_with(settings_module._SECRET_NAMES)
+        assert mock_get.call_count == 4
+        assert settings.foundry_project_endpoint == 'value-of-foundry-project-endpoint'
+        assert settings.ai_search_index_name == 'value-of-ai-search-index-name'
+        assert settings.mcp_connection_id == 'value-of-mcp-connection-id'
+
+
+class TestKeyVault:
+    """Test Key Vault secret helper"""
+    
+    def test_warm_cache_prefetches_secrets(self):
+        """Test that warmed secrets are served without another Key Vault call"""
+        from foundry_agents.utils import akv
+        
+        akv.clear_cache()
+        with patch.object(akv, '_get_client') as mock_client:
+            mock_client.return_value.get_secret.side_effect = lambda name: MagicMock(value=f'value-of-{name}')
+            akv.warm_cache(['a', 'b'])
+            assert akv.get_secret('a') == 'value-of-a'
+            assert akv.get_secret('b') == 'value-of-b'
+        akv.clear_cache()
+        
+        assert mock_client.return_value.get_secret.call_count == 2
 
+    
+    def test_get_client_builds_once_under_concurrency(self):
+        """Test that racing first calls construct a single SecretClient"""
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        from foundry_agents.utils import akv
+        
+        def slow_client(**kwargs):
+            time.sleep(0.05)
+            return MagicMock()
+        
+        with patch.object(akv, '_CLIENT', None), \
+                patch.dict('os.environ', {'KEY_VAULT_URI': 'https://test.vault.azure.net/'}), \
+                patch.object(akv, '_build_credential'), \
+                patch.object(akv, 'SecretClient', side_effect=slow_client) as mock_client:
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                clients = list(pool.map(lambda _: akv._get_client(), range(4)))
+        
+        assert mock_client.call_count == 1
+        assert all(client is clients[0] for client in clients)
 
 class TestToolsRegistry:
     """Test tools registry module"""
     
     def test_tool_registry_structure(self):
-        """Test that TOOL_REGISTRY has expected structure"""
-        from foundry_agents.configs.tools_registry import TOOL_REGISTRY
+        """Test that TOOL_REGISTRY maps names to builders of SDK-ready entries"""
+        from foundry_agents.configs.tools_registry import TOOL_REGISTRY, ToolEntry
         
-        assert isinstance(TOOL_REGISTRY, dict)
+        assert isinstance(TOOL_REGISTRY, Mapping)
         assert len(TOOL_REGISTRY) > 0
         
-        for tool_name, tool_config in TOOL_REGISTRY.items():
+        settings = SimpleNamespace(
+            ai_search_connection_id='test-search',
+            ai_search_index_name='test-index',
+            mcp_connection_id='test-mcp',
+        )
+        for tool_name, builder in TOOL_REGISTRY.items():
             assert isinstance(tool_name, str)
-            assert 'type' in tool_config
-            assert 'endpoint' in tool_config or 'package' in tool_config or 'api' in tool_config
+            assert callable(builder)
+            entry = builder(settings)
+            assert isinstance(entry, ToolEntry)
+            assert 'type' in entry.tool_def
+            assert isinstance(entry.tool_resources, Mapping)
     
     @patch('foundry_agents.configs.settings.get_settings')
     def test_resolve_tools(self, mock_get_settings):
@@ -81,6 +161,53 @@ class TestToolsRegistry:
         assert isinstance(tools, list)
         assert isinstance(resources, dict)
     
+    @patch('foundry_agents.configs.tools_registry.get_settings')
+    def test_resolve_tools_empty_skips_settings(self, mock_get_settings):
+        """Test that an empty tool list never touches Settings / Key Vault"""
+        from foundry_agents.configs.tools_registry import resolve_tools
+        
+        assert resolve_tools([]) == ([], {})
+        mock_get_settings.assert_not_called()
+    
+    @patch('foundry_agents.configs.tools_registry.get_settings')
+    def test_resolve_tools_builds_each_tool_once(self, mock_get_settings):
+        """Test that resolved entries are cached and never mutated by merges"""
+        from foundry_agents.configs import tools_registry
+        from foundry_agents.configs.tools_registry import ToolEntry, resolve_tools
+
+        builder = MagicMock(return_value=ToolEntry(
+            tool_def={"type": "fake"},
+            tool_resources={"fake": {"items": [1]}},
+        ))
+        tools_registry._resolve_cached.cache_clear()
+        with patch.dict(tools_registry._TOOL_REGISTRY, {"fake": builder}), \
+                patch.dict(tools_registry._RESOLVED, clear=True):
+            _, resources = resolve_tools(["fake", "fake"])
+            tools, single = resolve_tools(["fake"])
+
+            assert builder.call_count == 1
+            assert tools == [{"type": "fake"}]
+            assert resources == {"fake": {"items": [1, 1]}}
+            assert single == {"fake": {"items": [1]}}
+            assert resolve_tools(["fake"])[1] == single
+            assert resolve_tools(["fake"])[1] is not single
+            assert tools_registry._RESOLVED["fake"].tool_resources == {"fake": {"items": [1]}}
+        tools_registry._resolve_cached.cache_clear()
+
+    @patch('foundry_agents.configs.tools_registry.get_settings')
+    def test_resolve_tools_logs_unknown_tool_every_time(self, mock_get_settings):
+        """Test that sequences with unknown names are not memoized"""
+        from foundry_agents.configs import tools_registry
+        from foundry_agents.configs.tools_registry import resolve_tools
+        
+        tools_registry._resolve_cached.cache_clear()
+        with patch.object(tools_registry.logger, 'error') as mock_error:
+            assert resolve_tools(["no_such_tool"]) == ([], {})
+            assert resolve_tools(["no_such_tool"]) == ([], {})
+        
+        assert mock_error.call_count == 2
+        assert tools_registry._resolve_cached.cache_info().currsize == 0
+    
     def test_tool_registry_coverage(self):
         """Test that essential tools are registered"""
         from foundry_agents.configs.tools_registry import TOOL_REGISTRY
@@ -93,7 +220,7 @@ class TestToolsRegistry:
 class TestFoundryClient:
     """Test foundry client factory"""
     
-    @patch('foundry_agents.utils.foundry_client.DefaultAzureCredential')
+    @patch('foundry_agents.utils.credentials.DefaultAzureCredential')
     @patch('foundry_agents.utils.foundry_client.AIProjectClient')
     def test_get_project_client(self, mock_client_class, mock_credential):
         """Test get_project_client function"""
@@ -103,31 +230,163 @@ class TestFoundryClient:
         mock_client_instance = MagicMock()
         mock_client_class.return_value = mock_client_instance
         
-        with patch.dict('os.environ', {
-            'FOUNDRY_PROJECT_ENDPOINT': 'https://test.cognitiveservices.azure.com/',
-        }):
+        # Settings come from Key Vault, so stub them; start from no cached client
+        from foundry_agents.utils import credentials, foundry_client
+        with patch.object(foundry_client, 'get_settings', return_value=SimpleNamespace(
+            foundry_project_endpoint='https://test.cognitiveservices.azure.com/',
+            azure_client_id='',
+        )), patch.object(foundry_client, '_PROJECT_CLIENT', None), \
+                patch.dict(credentials._CRED_POOL, clear=True):
             client = get_project_client()
-            assert client is not None
+            assert client is mock_client_instance
+        mock_credential.assert_called_once()
     
-    @patch.dict('os.environ', {'AZURE_CLIENT_ID': 'test-id'})
+    @patch('foundry_agents.utils.foundry_client.get_settings')
+    def test_get_async_project_client_is_cached(self, mock_get_settings):
+        """Test that the async client is built once and uses the MSI client id"""
+        from foundry_agents.utils import foundry_client
+
+        mock_get_settings.return_value = MagicMock(
+            foundry_project_endpoint='https://test.services.ai.azure.com/api/projects/p',
+            azure_client_id='test-id',
+        )
+        with patch.object(foundry_client, '_ASYNC_PROJECT_CLIENT', None), \
+                patch.object(foundry_client, 'AsyncAIProjectClient') as mock_client_class, \
+                patch.object(foundry_client, 'AsyncManagedIdentityCredential') as mock_mi:
+            first = foundry_client.get_async_project_client()
+            second = foundry_client.get_async_project_client()
+
+        assert first is second
+        mock_client_class.assert_called_once()
+        mock_mi.assert_called_once_with(client_id='test-id')
+
     def test_credential_selection_with_managed_identity(self):
         """Test that ManagedIdentityCredential is used when AZURE_CLIENT_ID is set"""
+        from foundry_agents.utils import credentials
         from foundry_agents.utils.foundry_client import _build_credential
         
-        with patch('foundry_agents.utils.foundry_client.ManagedIdentityCredential') as mock_mi:
-            _build_credential()
-            mock_mi.assert_called_once()
+        with patch.dict(credentials._CRED_POOL, clear=True), \
+                patch('foundry_agents.utils.credentials.ManagedIdentityCredential') as mock_mi:
+            _build_credential(SimpleNamespace(azure_client_id='test-id'))
+            mock_mi.assert_called_once_with(client_id='test-id')
     
-    @patch.dict('os.environ', {}, clear=True)
     def test_credential_selection_default(self):
         """Test that DefaultAzureCredential is used when AZURE_CLIENT_ID is not set"""
+        from foundry_agents.utils import credentials
         from foundry_agents.utils.foundry_client import _build_credential
         
-        with patch('foundry_agents.utils.foundry_client.DefaultAzureCredential') as mock_default:
-            _build_credential()
+        with patch.dict(credentials._CRED_POOL, clear=True), \
+                patch('foundry_agents.utils.credentials.DefaultAzureCredential') as mock_default:
+            _build_credential(SimpleNamespace(azure_client_id=''))
             mock_default.assert_called_once()
 
 
+class TestCredentials:
+    """Test the token-caching credential wrapper"""
+    
+    def test_caching_credential_reuses_token_until_near_expiry(self):
+        """Test that tokens are reused until inside the refresh margin"""
+        from azure.core.credentials import AccessToken
+        from foundry_agents.utils.credentials import CachingCredential
+        
+        inner = MagicMock()
+        inner.get_token.side_effect = [
+            AccessToken('first', 10_000),
+            AccessToken('second', 20_000),
+        ]
+        credential = CachingCredential(inner)
+        scope = 'https://vault.azure.net/.default'
+        
+        with patch('foundry_agents.utils.credentials.time.time', return_value=1_000):
+            assert credential.get_token(scope).token == 'first'
+            assert credential.get_token(scope).token == 'first'
+        with patch('foundry_agents.utils.credentials.time.time', return_value=9_800):
+            assert credential.get_token(scope).token == 'second'
+        
+        assert inner.get_token.call_count == 2
+    
+    def test_caching_credential_bypasses_cache_for_claims(self):
+        """Test that a claims challenge always reaches the inner credential"""
+        from azure.core.credentials import AccessToken
+        from foundry_agents.utils.credentials import CachingCredential
+        
+        inner = MagicMock()
+        inner.get_token.return_value = AccessToken('token', 10**12)
+        credential = CachingCredential(inner)
+        
+        credential.get_token('scope', claims='challenge')
+        credential.get_token('scope', claims='challenge')
+        
+        assert inner.get_token.call_count == 2
+    
+    def test_caching_credential_keys_on_cae(self):
+        """Test that CAE and non-CAE tokens are cached separately"""
+        from azure.core.credentials import AccessToken
+        from foundry_agents.utils.credentials import CachingCredential
+        
+        inner = MagicMock()
+        inner.get_token.side_effect = lambda *scopes, **kwargs: AccessToken(
+            'cae' if kwargs.get('enable_cae') else 'plain', 10**12
+        )
+        credential = CachingCredential(inner)
+        
+        assert credential.get_token('scope').token == 'plain'
+        assert credential.get_token('scope', enable_cae=True).token == 'cae'
+        assert credential.get_token('scope').token == 'plain'
+        assert credential.get_token('scope', enable_cae=True).token == 'cae'
+        assert inner.get_token.call_count == 2
+    
+    def test_caching_credential_concurrent_misses_share_one_request(self):
+        """Test that threads missing the cache together make one token request"""
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        from azure.core.credentials import AccessToken
+        from foundry_agents.utils.credentials import CachingCredential
+        
+        def slow_token(*scopes, **kwargs):
+            time.sleep(0.05)
+            return AccessToken('token', 10**12)
+        
+        inner = MagicMock()
+        inner.get_token.side_effect = slow_token
+        credential = CachingCredential(inner)
+        
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            tokens = list(pool.map(lambda _: credential.get_token('scope').token, range(4)))
+        
+        assert tokens == ['token'] * 4
+        assert inner.get_token.call_count == 1
+    
+    def test_async_caching_credential_reuses_token(self):
+        """Test that the async wrapper caches like the sync one"""
+        import asyncio
+        from unittest.mock import AsyncMock
+        from azure.core.credentials import AccessToken
+        from foundry_agents.utils.credentials import AsyncCachingCredential
+        
+        inner = MagicMock()
+        inner.get_token = AsyncMock(return_value=AccessToken('token', 10**12))
+        credential = AsyncCachingCredential(inner)
+        
+        async def fetch_twice():
+            return [(await credential.get_token('scope')).token for _ in range(2)]
+        
+        assert asyncio.run(fetch_twice()) == ['token', 'token']
+        inner.get_token.assert_awaited_once()
+    
+    def test_get_credential_pools_per_client_id(self):
+        """Test that one credential is built per managed-identity client id"""
+        from foundry_agents.utils import credentials
+        
+        with patch.dict(credentials._CRED_POOL, clear=True), \
+                patch.object(credentials, 'ManagedIdentityCredential') as mock_mi:
+            first = credentials.get_credential('id-a')
+            assert credentials.get_credential('id-a') is first
+            assert credentials.get_credential('id-b') is not first
+        
+        assert mock_mi.call_count == 2
+
+
 class TestPrompts:
     """Test prompts module"""
     
@@ -186,7 +445,7 @@ def mock_settings():
 @pytest.fixture
 def mock_azure_credentials():
     """Fixture for mocked Azure credentials"""
-    with patch('foundry_agents.utils.foundry_client.DefaultAzureCredential'):
+    with patch('foundry_agents.utils.credentials.DefaultAzureCredential'):
         yield
 
 
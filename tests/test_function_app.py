@@ -31,6 +31,67 @@ class TestFunctionApp:
         except ImportError:
             pytest.skip("Function app not available in test environment")
     
+    def test_response_queue_client_is_reused(self):
+        """Test that repeated sends reuse one service client per worker"""
+        import function_app
+
+        function_app._get_queue_service.cache_clear()
+        function_app._get_queue_client.cache_clear()
+        with patch.object(function_app, 'QueueServiceClient') as mock_service:
+            function_app.send_response_to_queue({'requestId': '1'}, 'sk-agent-response-queue')
+            function_app.send_response_to_queue({'requestId': '2'}, 'sk-agent-response-queue')
+
+        mock_service.assert_called_once()
+        assert mock_service.call_args.kwargs['retry_total'] == function_app._SEND_RETRY_TOTAL
+        mock_service.return_value.get_queue_client.assert_called_once_with('sk-agent-response-queue')
+        assert mock_service.return_value.get_queue_client.return_value.send_message.call_count == 2
+        function_app._get_queue_service.cache_clear()
+        function_app._get_queue_client.cache_clear()
+
+    def test_response_to_deleted_request_queue_is_dropped(self):
+        """Test that a late reply to a deleted per-request queue is not retried"""
+        from azure.core.exceptions import ResourceNotFoundError
+        import function_app
+
+        function_app._get_queue_client.cache_clear()
+        with patch.object(function_app, '_get_queue_service') as mock_service:
+            send = mock_service.return_value.get_queue_client.return_value.send_message
+            send.side_effect = ResourceNotFoundError('QueueNotFound')
+            function_app.send_response_to_queue({'requestId': '1'}, 'sk-agent-response-1')
+            # The shared queue shares the prefix but must still raise
+            for queue_name in (function_app._RESPONSE_QUEUE_NAME, 'other-queue'):
+                with pytest.raises(ResourceNotFoundError):
+                    function_app.send_response_to_queue({'requestId': '2'}, queue_name)
+        function_app._get_queue_client.cache_clear()
+
+    @pytest.mark.parametrize("response_queue", [123, ['sk-agent-response-1'], None])
+    def test_non_string_response_queue_uses_shared_queue(self, response_queue):
+        """Test that a malformed responseQueue falls back to the shared queue"""
+        import function_app
+
+        handler = function_app.sk_agent_processor._function.get_user_function()
+        mock_message = MagicMock(spec=func.QueueMessage)
+        mock_message.get_body.return_value = json.dumps({
+            'requestId': '1', 'query': 'q', 'responseQueue': response_queue
+        }).encode()
+
+        with patch.object(function_app, 'send_response_to_queue') as mock_send:
+            handler(mock_message)
+
+        assert mock_send.call_args.args[1] == function_app._RESPONSE_QUEUE_NAME
+
+    @pytest.mark.parametrize("body", [b'["requestId"]', b'"query"', b'42'])
+    def test_sk_request_must_be_object(self, body):
+        """Test that valid JSON which is not an object is rejected as ValueError"""
+        import function_app
+
+        handler = function_app.sk_agent_processor._function.get_user_function()
+        mock_message = MagicMock(spec=func.QueueMessage)
+        mock_message.get_body.return_value = body
+
+        with pytest.raises(ValueError, match='JSON object'):
+            handler(mock_message)
+
     @patch('foundry_agents.utils.foundry_client.get_project_client')
     @patch('foundry_agents.configs.settings.get_settings')
     def test_agent_creation_processor_structure(self, mock_settings, mock_client):
@@ -59,7 +120,7 @@ class TestFunctionApp:
                 'instructions': 'Test instructions',
                 'tools': ['ai_search']
             }
-            mock_message.get_body.return_value.decode.return_value = json.dumps(agent_config)
+            mock_message.get_body.return_value = json.dumps(agent_config).encode()
             
             # Test function would be called here if we could access it from app
             # For now, we just verify the imports work
@@ -109,7 +170,71 @@ class TestFunctionApp:
 
 class TestQueueTriggers:
     """Test queue trigger functionality"""
-    
+
+    def test_agent_job_decoding(self):
+        """Test that agent jobs decode from bytes with defaults and legacy names"""
+        import function_app
+
+        job = function_app._AGENT_JOB_DECODER.decode(
+            b'{"agent_name": "doc-bot", "tools": ["ai_search"], "extra": 1}'
+        )
+        assert job.agent_name == 'doc-bot'
+        assert job.model == function_app.DEFAULT_AGENT_MODEL
+        assert job.instructions is None
+        assert job.tools == ('ai_search',)
+        assert hash(job) == hash(function_app._AGENT_JOB_DECODER.decode(
+            b'{"agent_name": "doc-bot", "tools": ["ai_search"]}'
+        ))
+
+        legacy = function_app._AGENT_JOB_DECODER.decode(
+            b'{"agentName": "legacy-bot", "mcpEndpoint": "https://x", "models": []}'
+        )
+        assert legacy.agent_name is None
+        assert legacy.legacy_agent_name == 'legacy-bot'
+
+    def test_agent_creation_drops_invalid_schema(self):
+        """Test that a schema-invalid job is logged and dropped, not retried"""
+        import asyncio
+        import function_app
+
+        handler = function_app.agent_creation_processor._function.get_user_function()
+        mock_message = MagicMock(spec=func.QueueMessage)
+        mock_message.get_body.return_value = b'{"agent_name": "doc-bot", "tools": "ai_search"}'
+
+        with patch('foundry_agents.utils.foundry_client.get_async_project_client') as mock_client:
+            assert asyncio.run(handler(mock_message)) is None
+
+        mock_client.assert_not_called()
+
+    def test_agent_creation_drops_malformed_json(self):
+        """Test that malformed JSON is logged and dropped, not retried"""
+        import asyncio
+        import function_app
+
+        handler = function_app.agent_creation_processor._function.get_user_function()
+        mock_message = MagicMock(spec=func.QueueMessage)
+        mock_message.get_body.return_value = b'{ invalid json }'
+
+        with patch('foundry_agents.utils.foundry_client.get_async_project_client') as mock_client:
+            assert asyncio.run(handler(mock_message)) is None
+
+        mock_client.assert_not_called()
+
+    @pytest.mark.parametrize("body", [b'', b'  \n'])
+    def test_agent_creation_drops_empty_message(self, body):
+        """Test that an empty body is dropped before it reaches the decoder"""
+        import asyncio
+        import function_app
+
+        handler = function_app.agent_creation_processor._function.get_user_function()
+        mock_message = MagicMock(spec=func.QueueMessage)
+        mock_message.get_body.return_value = body
+
+        with patch.object(function_app, '_AGENT_JOB_DECODER') as mock_decoder:
+            assert asyncio.run(handler(mock_message)) is None
+
+        mock_decoder.decode.assert_not_called()
+
     def test_queue_message_parsing(self):
         """Test parsing of queue messages"""
         message_body = {